@@ -0,0 +1,155 @@
+import asyncio
+import time
+from typing import AsyncIterator, Generic, Optional, TypeVar
+
+from naylence.fame.core import (
+    FameDeliveryContext,
+    FameEnvelope,
+    FameMessageResponse,
+    parse_address,
+)
+from naylence.fame.delivery.delivery_tracker import EnvelopeStatus
+from naylence.fame.node.node_event_listener import NodeEventListener
+from naylence.fame.node.node_like import NodeLike
+
+from naylence.agent import BaseAgent, BaseAgentState
+
+StateT = TypeVar("StateT", bound=BaseAgentState)
+
+
+class DrainingAgent(BaseAgent[StateT], Generic[StateT]):
+    """
+    ``BaseAgent`` that drains before its node stops and ramps up after it starts.
+
+    When the node begins to stop (e.g. on SIGTERM from ``docker compose stop``),
+    the agent stops polling its inbox and waits up to ``drain_timeout_sec`` for
+    the envelopes already in its handler to finish; only then does the node
+    detach. The runtime acks an envelope when it is polled, so envelopes that
+    arrive while draining are neither acked nor handled, and their senders
+    retransmit them to the next instance.
+
+    After a start, the envelopes the previous instance left unhandled in the
+    durable inbox are paced so that they do not all hit the agent at once:
+    their handling starts at ``initial_rate`` envelopes per second and speeds
+    up until, ``warmup_sec`` after the start, it is no longer limited. The
+    runtime replays them from a recovery task of its own, so the pacing never
+    holds up polling, acks, or new messages and RPCs. Retransmissions of
+    envelopes already in the inbox are answered by the runtime and do not
+    reach the handler.
+    """
+
+    def __init__(
+        self,
+        *args,
+        drain_timeout_sec: float = 10.0,
+        initial_rate: float = 5.0,
+        warmup_sec: float = 10.0,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self._drain_timeout_sec = drain_timeout_sec
+        self._initial_rate = initial_rate
+        self._warmup_sec = warmup_sec
+        self._started_at = time.monotonic()
+        self._next_slot = self._started_at
+        self._draining = False
+        # Ids of the envelopes the runtime is about to recover.
+        self._recovered: set[str] = set()
+        self._in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.deferred = 0
+
+    @property
+    def draining(self) -> bool:
+        return self._draining
+
+    async def start(self) -> None:
+        from naylence.fame.node.node import get_node
+
+        node = get_node()
+        self._started_at = self._next_slot = time.monotonic()
+        # The node lists what it will recover before our handler is registered.
+        tracker = getattr(node, "_delivery_tracker", None)
+        if tracker is not None:
+            pending = await tracker.list_inbound(
+                filter=lambda tracked: (
+                    tracked.status
+                    in (EnvelopeStatus.RECEIVED, EnvelopeStatus.FAILED_TO_HANDLE)
+                )
+            )
+            self._recovered = {tracked.envelope_id for tracked in pending}
+        node.add_event_listener(_DrainOnStop(self))
+
+    async def drain(self) -> bool:
+        """Stop taking new envelopes; True if in-flight ones finished in time."""
+        self._draining = True
+        self._stop_polling()
+        try:
+            await asyncio.wait_for(self._idle.wait(), self._drain_timeout_sec)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def handle_message(
+        self, envelope: FameEnvelope, context: Optional[FameDeliveryContext] = None
+    ) -> Optional[FameMessageResponse | AsyncIterator[FameMessageResponse]]:
+        if envelope.id in self._recovered:
+            # Called from the runtime's recovery task, not the poll loop.
+            self._recovered.discard(envelope.id)
+            await self._pace()
+            if self._draining:
+                # Leave it in the inbox for the next instance: the recovery
+                # task waits here until the node stops and cancels it.
+                self.deferred += 1
+                await asyncio.Future()
+
+        self._in_flight += 1
+        self._idle.clear()
+        try:
+            return await super().handle_message(envelope, context)
+        finally:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._idle.set()
+
+    async def _pace(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._started_at
+        if elapsed >= self._warmup_sec:
+            return
+        rate = self._initial_rate / max(1.0 - elapsed / self._warmup_sec, 1e-3)
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + 1.0 / rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def _stop_polling(self) -> None:
+        from naylence.fame.node.node import get_node
+
+        if self.address is None:
+            return
+        names = {str(self.address), parse_address(str(self.address))[0]}
+        listeners = get_node()._envelope_listener_manager._listeners  # type: ignore
+        for service_name, listener in list(listeners.items()):
+            if service_name in names:
+                # Only the stop flag: cancelling the poll loop would also
+                # cancel the handler it is running.
+                listener._stop_fn()
+
+
+class _DrainOnStop(NodeEventListener):
+    def __init__(self, agent: DrainingAgent):
+        super().__init__()
+        self._agent = agent
+
+    async def on_node_preparing_to_stop(self, node: NodeLike) -> None:
+        # Runs before the node stops its listeners and detaches upstream.
+        name = type(self._agent).__name__
+        if await self._agent.drain():
+            print(
+                f"{name} drained, {self._agent.deferred} recovered message(s) "
+                "left for restart"
+            )
+        else:
+            print(f"{name} drain timed out; unfinished messages will be redelivered")
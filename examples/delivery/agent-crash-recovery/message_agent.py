@@ -1,17 +1,26 @@
 import asyncio
+import os
 import sys
 from typing import Any, Optional
 
 from common import AGENT_ADDR
+from graceful_drain import DrainingAgent
 from naylence.fame.core import FameMessageResponse
-from naylence.agent import BaseAgent, BaseAgentState, configs
+from naylence.agent import BaseAgentState, configs
 
 
 class Counter(BaseAgentState):
     count: int = 0
 
 
-class MessageAgent(BaseAgent[Counter]):
+class MessageAgent(DrainingAgent[Counter]):
+    def __init__(self):
+        super().__init__(
+            drain_timeout_sec=float(os.getenv("DRAIN_TIMEOUT_SEC", "10")),
+            initial_rate=float(os.getenv("REDELIVERY_INITIAL_RATE", "5")),
+            warmup_sec=float(os.getenv("REDELIVERY_WARMUP_SEC", "10")),
+        )
+
     async def on_message(self, message: Any) -> Optional[FameMessageResponse]:
         async with self.state as state:
             print("MessageAgent current state:", state.count)
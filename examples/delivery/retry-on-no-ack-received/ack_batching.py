@@ -0,0 +1,163 @@
+import asyncio
+
+from naylence.fame.node.node_event_listener import NodeEventListener
+
+from naylence.fame.node.node_like import NodeLike
+
+from naylence.fame.core import (
+    DataFrame,
+    DeliveryAckFrame,
+    DeliveryOriginType,
+    FameDeliveryContext,
+    FameEnvelope,
+    format_address,
+)
+from naylence.fame.delivery.delivery_tracker import EnvelopeStatus
+
+BATCH_KEY = "batched_acks"
+
+
+class AckBatcher(NodeEventListener):
+    """
+    Receiver side: coalesces outgoing delivery acks into batches.
+
+    Positive acks headed upstream are held per destination and sent as one
+    envelope carrying every ``(ref_id, corr_id)`` pair once ``max_batch`` acks
+    are queued or ``max_delay_ms`` has passed since the first one. Repeated
+    acks for the same ``ref_id`` within a batch (one per retransmission) are
+    sent once. NACKs are never delayed.
+
+    ``max_delay_ms`` must stay well below the sender's retry delay, or the
+    sender retransmits messages whose ack is merely waiting in a batch.
+    """
+
+    def __init__(self, *, max_batch: int = 64, max_delay_ms: int = 50):
+        super().__init__()
+        self._max_batch = max_batch
+        self._max_delay_ms = max_delay_ms
+        self._batches: dict[str, dict[str, str]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._flushes: set[asyncio.Task] = set()
+        self.acks_batched = 0
+        self.duplicates_dropped = 0
+        self.batches_sent = 0
+
+    async def on_forward_upstream(
+        self,
+        node: NodeLike,
+        envelope: FameEnvelope,
+        context: FameDeliveryContext | None = None,
+    ) -> FameEnvelope | None:
+        frame = envelope.frame
+        if not (
+            isinstance(frame, DeliveryAckFrame)
+            and frame.ok
+            and frame.ref_id
+            and envelope.corr_id
+            and envelope.to
+        ):
+            return envelope
+
+        destination = str(envelope.to)
+        batch = self._batches.setdefault(destination, {})
+        if frame.ref_id in batch:
+            self.duplicates_dropped += 1
+            return None
+        batch[frame.ref_id] = envelope.corr_id
+        self.acks_batched += 1
+
+        if len(batch) >= self._max_batch:
+            await self._flush(node, destination)
+        elif destination not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[destination] = loop.call_later(
+                self._max_delay_ms / 1000, self._flush_later, node, destination
+            )
+        return None
+
+    def _flush_later(self, node: NodeLike, destination: str) -> None:
+        task = asyncio.create_task(self._flush(node, destination))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def on_node_stopped(self, node: NodeLike) -> None:
+        for destination in list(self._batches):
+            await self._flush(node, destination)
+
+    async def _flush(self, node: NodeLike, destination: str) -> None:
+        timer = self._timers.pop(destination, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._batches.pop(destination, None)
+        if not batch:
+            return
+        envelope = node.envelope_factory.create_envelope(
+            to=destination,
+            frame=DataFrame(payload={BATCH_KEY: list(batch.items())}),
+        )
+        self.batches_sent += 1
+        # Straight upstream: the batch itself must not be tracked or acked.
+        await node.forward_upstream(envelope, None)
+
+
+class BatchedAckReceiver(NodeEventListener):
+    """
+    Sender side: expands a batch from ``AckBatcher`` into individual acks.
+
+    Each ``(ref_id, corr_id)`` pair is delivered as a regular ``DeliveryAckFrame``,
+    so the delivery tracker resolves and stops retransmitting every message in
+    the batch exactly as if its ack had arrived on its own.
+
+    Only batches addressed to this node's own ack address (the system inbox
+    the tracker puts in ``reply_to``) and arriving from ``origin`` are
+    expanded; other batches at that address are dropped. Pairs whose
+    ``ref_id`` has no pending outbound record with the same ``corr_id`` are
+    skipped.
+    """
+
+    def __init__(self, *, origin: DeliveryOriginType = DeliveryOriginType.UPSTREAM):
+        super().__init__()
+        self._origin = origin
+        self.batches_rejected = 0
+        self.acks_ignored = 0
+
+    async def on_deliver(
+        self,
+        node: NodeLike,
+        envelope: FameEnvelope,
+        context: FameDeliveryContext | None,
+    ) -> FameEnvelope | None:
+        frame = envelope.frame
+        if not (
+            isinstance(frame, DataFrame)
+            and isinstance(frame.payload, dict)
+            and BATCH_KEY in frame.payload
+        ):
+            return envelope
+
+        from naylence.fame.node.node import SYSTEM_INBOX
+
+        if str(envelope.to) != format_address(SYSTEM_INBOX, node.physical_path):
+            return envelope
+        if context is None or context.origin_type != self._origin:
+            self.batches_rejected += 1
+            return None
+
+        tracker = getattr(node, "_delivery_tracker", None)
+        for ref_id, corr_id in frame.payload[BATCH_KEY]:
+            tracked = await tracker.get_tracked_envelope(ref_id) if tracker else None
+            if (
+                tracked is None
+                or tracked.status != EnvelopeStatus.PENDING
+                or tracked.original_envelope.corr_id != corr_id
+            ):
+                self.acks_ignored += 1
+                continue
+            ack = node.envelope_factory.create_envelope(
+                to=envelope.to,
+                frame=DeliveryAckFrame(ok=True, ref_id=ref_id),
+                corr_id=corr_id,
+                trace_id=envelope.trace_id,
+            )
+            await node.deliver(ack, context)
+        return None
@@ -0,0 +1,224 @@
+import asyncio
+import random
+import time
+from typing import Any, Optional
+
+from pydantic import BaseModel, PrivateAttr
+
+from naylence.fame.core import (
+    DataFrame,
+    DeliveryAckFrame,
+    FameAddress,
+    FameDeliveryContext,
+    FameEnvelope,
+    create_fame_envelope,
+)
+from naylence.fame.delivery.at_least_once_delivery_policy import (
+    AtLeastOnceDeliveryPolicy,
+)
+from naylence.fame.delivery.retry_policy import RetryPolicy
+from naylence.fame.node.node_like import NodeLike
+
+
+class RttEstimator:
+    """Smoothed round-trip time and retransmission timeout, as in RFC 6298."""
+
+    def __init__(self, *, initial_rto_ms: float, min_rto_ms: float, max_rto_ms: float):
+        self.srtt_ms: Optional[float] = None
+        self.rttvar_ms: Optional[float] = None
+        self.rto_ms = initial_rto_ms
+        self._min_rto_ms = min_rto_ms
+        self._max_rto_ms = max_rto_ms
+
+    def observe(self, rtt_ms: float) -> None:
+        if self.srtt_ms is None or self.rttvar_ms is None:
+            self.srtt_ms, self.rttvar_ms = rtt_ms, rtt_ms / 2
+        else:
+            self.rttvar_ms = 0.75 * self.rttvar_ms + 0.25 * abs(self.srtt_ms - rtt_ms)
+            self.srtt_ms = 0.875 * self.srtt_ms + 0.125 * rtt_ms
+        rto = self.srtt_ms + max(1.0, 4 * self.rttvar_ms)
+        self.rto_ms = min(self._max_rto_ms, max(self._min_rto_ms, rto))
+
+
+class RetryBudget:
+    """
+    Caps retransmissions at a fraction of new messages.
+
+    Every new message adds ``ratio`` tokens and every retransmission spends
+    one. The budget starts with ``min_tokens``, so a quiet sender can still
+    retry, and holds at most ``min_tokens`` plus the deposits of ``window``
+    messages, so a long healthy run cannot save up for a loss storm that
+    multiplies the load on the receiver.
+    """
+
+    def __init__(self, *, ratio: float, min_tokens: int, window: int = 100):
+        self._ratio = ratio
+        self._max_tokens = min_tokens + ratio * window
+        self.tokens = float(min_tokens)
+
+    def deposit(self) -> None:
+        # Rounded so that e.g. five deposits of 0.2 add up to a whole token.
+        self.tokens = round(min(self._max_tokens, self.tokens + self._ratio), 6)
+
+    def try_spend(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class AdaptiveRetryPolicy(RetryPolicy):
+    """
+    Retry policy whose delay follows the measured RTO of one destination.
+
+    The n-th wait is ``rto * backoff_factor ** (n - 1)`` plus up to ``jitter`` of
+    it, capped at ``max_delay_ms``. Jitter only ever lengthens the wait, so a
+    retry never fires before the estimated timeout.
+    """
+
+    type: str = "AdaptiveRetryPolicy"
+    jitter: float = 0.2
+
+    _estimator: RttEstimator = PrivateAttr()
+
+    def bind(self, estimator: RttEstimator) -> "AdaptiveRetryPolicy":
+        self._estimator = estimator
+        return self
+
+    def next_delay_ms(self, attempt: int) -> int:
+        delay = self._estimator.rto_ms * self.backoff_factor ** max(attempt - 1, 0)
+        delay *= 1 + random.uniform(0, self.jitter)
+        return int(min(delay, self.max_delay_ms))
+
+
+class DestinationStats(BaseModel):
+    srtt_ms: Optional[float] = None
+    rttvar_ms: Optional[float] = None
+    rto_ms: float
+    sent: int = 0
+    acked: int = 0
+    retransmissions: int = 0
+    retries_suppressed: int = 0
+    timeouts: int = 0
+    budget_tokens: float = 0
+
+
+class _Destination:
+    def __init__(
+        self, estimator: RttEstimator, policy: AdaptiveRetryPolicy, budget: RetryBudget
+    ):
+        self.estimator = estimator
+        self.delivery_policy = AtLeastOnceDeliveryPolicy(sender_retry_policy=policy)
+        self.budget = budget
+        self.stats = DestinationStats(rto_ms=estimator.rto_ms)
+
+
+class AdaptiveSender:
+    """
+    At-least-once ``send_message`` with a per-destination adaptive retry timer.
+
+    Round-trip times of messages acked on their first transmission feed an RTT
+    estimator per destination (retransmitted messages are ambiguous and are not
+    sampled), and the resulting RTO drives the retry delays through
+    ``AdaptiveRetryPolicy``. Retransmissions are paid for from a per-destination
+    ``RetryBudget``; once it is empty, retries are skipped until the overall
+    timeout or a later retry finds budget again. ``metrics()`` returns the
+    timer state and counters for every destination.
+    """
+
+    def __init__(
+        self,
+        node: NodeLike,
+        *,
+        max_retries: int = 5,
+        initial_rto_ms: int = 1000,
+        min_rto_ms: int = 200,
+        max_rto_ms: int = 10_000,
+        backoff_factor: float = 2.0,
+        jitter: float = 0.2,
+        budget_ratio: float = 0.2,
+        budget_min_tokens: int = 10,
+        budget_window: int = 100,
+        timeout_ms: Optional[int] = None,
+    ):
+        self._node = node
+        self._timeout_ms = timeout_ms
+        self._budget_ratio = budget_ratio
+        self._budget_min_tokens = budget_min_tokens
+        self._budget_window = budget_window
+        self._rto = (initial_rto_ms, min_rto_ms, max_rto_ms)
+        self._policy = dict(
+            max_retries=max_retries,
+            max_delay_ms=max_rto_ms,
+            backoff_factor=backoff_factor,
+            jitter=jitter,
+        )
+        self._destinations: dict[str, _Destination] = {}
+
+    async def send_message(
+        self, address: FameAddress | str, message: Any
+    ) -> Optional[DeliveryAckFrame]:
+        destination = self._destination(str(address))
+        stats = destination.stats
+        envelope = create_fame_envelope(
+            to=FameAddress(address), frame=DataFrame(payload=message)
+        )
+        attempts = 0
+        sent_at = 0.0
+
+        async def deliver(env: FameEnvelope, context: Optional[FameDeliveryContext]):
+            nonlocal attempts, sent_at
+            if attempts and not destination.budget.try_spend():
+                stats.retries_suppressed += 1
+                return
+            if attempts:
+                stats.retransmissions += 1
+            attempts += 1
+            sent_at = time.monotonic()
+            await self._node.deliver(env, context)
+
+        destination.budget.deposit()
+        stats.sent += 1
+        try:
+            ack = await self._node.send(
+                envelope,
+                delivery_policy=destination.delivery_policy,
+                delivery_fn=deliver,
+                timeout_ms=self._timeout_ms,
+            )
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            raise
+        stats.acked += 1
+        if attempts == 1:
+            destination.estimator.observe((time.monotonic() - sent_at) * 1000)
+        return ack
+
+    def metrics(self) -> dict[str, DestinationStats]:
+        for destination in self._destinations.values():
+            estimator = destination.estimator
+            destination.stats.srtt_ms = estimator.srtt_ms
+            destination.stats.rttvar_ms = estimator.rttvar_ms
+            destination.stats.rto_ms = estimator.rto_ms
+            destination.stats.budget_tokens = destination.budget.tokens
+        return {
+            address: destination.stats.model_copy()
+            for address, destination in self._destinations.items()
+        }
+
+    def _destination(self, address: str) -> _Destination:
+        destination = self._destinations.get(address)
+        if destination is None:
+            initial, low, high = self._rto
+            estimator = RttEstimator(
+                initial_rto_ms=initial, min_rto_ms=low, max_rto_ms=high
+            )
+            policy = AdaptiveRetryPolicy(**self._policy).bind(estimator)
+            budget = RetryBudget(
+                ratio=self._budget_ratio,
+                min_tokens=self._budget_min_tokens,
+                window=self._budget_window,
+            )
+            destination = _Destination(estimator, policy, budget)
+            self._destinations[address] = destination
+        return destination
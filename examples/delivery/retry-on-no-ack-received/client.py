@@ -1,7 +1,12 @@
 import asyncio
+import time
 
+from ack_batching import BatchedAckReceiver
+from adaptive_retry import AdaptiveSender
 from common import AGENT_ADDR
+from fault_injector import FaultInjector
 from naylence.fame.core import FameFabric
+from pipelined_sender import PipelinedSender
 
 from naylence.agent import configs
 from naylence.fame.util.logging import enable_logging
@@ -11,10 +16,42 @@ enable_logging(log_level="warning")
 
 async def main():
     async with FameFabric.create(root_config=configs.CLIENT_CONFIG) as fabric:
+        from naylence.fame.node.node import get_node
+
+        # Understands batched acks from an agent running AckBatcher.
+        get_node().add_event_listener(BatchedAckReceiver())
+        # Optional: simulate network faults on the client side as well.
+        if faults := FaultInjector.from_env():
+            get_node().add_event_listener(faults)
+
         print("Sending message to MessageAgent...")
         ack_frame = await fabric.send_message(AGENT_ADDR, "Hello, World!")
         print("Acknowledgment received:", ack_frame)
 
+        # Up to 8 messages wait for their ack at once instead of one at a time.
+        sender = PipelinedSender(fabric, AGENT_ADDR, window=8)
+        started = time.perf_counter()
+        acks = [await sender.send(f"Pipelined message #{i}") for i in range(10)]
+        # Messages with the same key are still delivered one after the other.
+        acks += [await sender.send(f"Ordered step #{i}", key="job-1") for i in range(3)]
+        await sender.flush()
+        elapsed = time.perf_counter() - started
+        acked = sum(
+            1 for f in acks if not f.exception() and getattr(f.result(), "ok", 0)
+        )
+        print(f"Pipelined: {acked}/{len(acks)} messages acknowledged in {elapsed:.2f}s")
+
+        # Retry timer follows the measured round-trip time instead of a fixed delay.
+        adaptive = AdaptiveSender(get_node())
+        for i in range(5):
+            await adaptive.send_message(AGENT_ADDR, f"Adaptive message #{i}")
+        stats = adaptive.metrics()[AGENT_ADDR]
+        print(
+            f"Adaptive: srtt={stats.srtt_ms or 0:.0f}ms rto={stats.rto_ms:.0f}ms "
+            f"retransmissions={stats.retransmissions} "
+            f"suppressed={stats.retries_suppressed}"
+        )
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,199 @@
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Optional
+
+from pydantic import BaseModel
+
+from naylence.fame.core import (
+    DataFrame,
+    FameDeliveryContext,
+    FameEnvelope,
+    FameMessageResponse,
+)
+from naylence.fame.storage.key_value_store import KeyValueStore
+
+from naylence.agent import BaseAgent
+
+
+class SeenEnvelope(BaseModel):
+    seen_at: float
+
+
+class _BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self._size = bits
+        self._hashes = max(1, round(bits / capacity * math.log(2)))
+        self._bits = bytearray((bits + 7) // 8)
+        self.count = 0
+
+    def add(self, key: str) -> None:
+        self.count += 1
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self._size for i in range(self._hashes))
+
+
+class DedupStore:
+    """
+    Remembers the ids of envelopes handled within the last ``window_sec``.
+
+    Ids go into a ring of bloom filters, one per ``buckets`` slice of the
+    window, so expiring old ids means dropping the oldest filters. A slice that
+    takes more than ``bucket_capacity`` ids starts another filter rather than
+    overfill one, which keeps the false positive rate at ``error_rate``. A
+    bloom filter can only say "maybe seen", so a hit is confirmed against an
+    exact set of recent ids and, if one is given, the persisted ``store``. New
+    ids, the common case, are answered by the filters alone.
+
+    The exact set holds up to ``max_exact`` ids, by default the
+    ``buckets * bucket_capacity`` a full window is sized for. A hit that
+    neither confirms counts as a new message and is handled: the runtime has
+    already acked it, so dropping a new message would lose it, while handling
+    a duplicate only costs a repeat. ``unconfirmed`` counts those hits.
+    Persisted ids are indexed by bucket in memory and deleted from the store
+    when their bucket expires.
+    """
+
+    def __init__(
+        self,
+        *,
+        window_sec: float = 300.0,
+        buckets: int = 10,
+        bucket_capacity: int = 10_000,
+        error_rate: float = 0.001,
+        max_exact: Optional[int] = None,
+    ):
+        self._window_sec = window_sec
+        self._bucket_sec = window_sec / buckets
+        self._buckets = buckets
+        self._bucket_capacity = bucket_capacity
+        self._error_rate = error_rate
+        self._max_exact = max_exact or buckets * bucket_capacity
+        # bucket -> its filters; only the last one still takes ids.
+        self._filters: dict[int, list[_BloomFilter]] = {}
+        self._exact: OrderedDict[str, float] = OrderedDict()
+        self._store: Optional[KeyValueStore[SeenEnvelope]] = None
+        # bucket -> ids persisted in it, for deleting them once it expires.
+        self._persisted: dict[int, list[str]] = {}
+        self.unconfirmed = 0
+
+    async def open(self, store: KeyValueStore[SeenEnvelope]) -> None:
+        """Persist seen ids to ``store`` and reload those still in the window."""
+        self._store = store
+        now = time.time()
+        for envelope_id, record in sorted(
+            (await store.list()).items(), key=lambda item: item[1].seen_at
+        ):
+            if now - record.seen_at < self._window_sec:
+                self._remember(envelope_id, record.seen_at)
+                self._index(envelope_id, record.seen_at)
+            else:
+                await store.delete(envelope_id)
+
+    async def seen(self, envelope_id: str) -> bool:
+        now = time.time()
+        await self._expire(now)
+        if not any(
+            envelope_id in bloom
+            for blooms in self._filters.values()
+            for bloom in blooms
+        ):
+            return False
+        seen_at = self._exact.get(envelope_id)
+        if seen_at is None and self._store is not None:
+            record = await self._store.get(envelope_id)
+            seen_at = record.seen_at if record else None
+        if seen_at is None or now - seen_at >= self._window_sec:
+            self.unconfirmed += 1
+            return False
+        return True
+
+    async def add(self, envelope_id: str) -> None:
+        now = time.time()
+        self._remember(envelope_id, now)
+        if self._store is not None:
+            await self._store.set(envelope_id, SeenEnvelope(seen_at=now))
+            self._index(envelope_id, now)
+
+    def _remember(self, envelope_id: str, seen_at: float) -> None:
+        bucket = int(seen_at // self._bucket_sec)
+        blooms = self._filters.setdefault(bucket, [])
+        if not blooms or blooms[-1].count >= self._bucket_capacity:
+            blooms.append(_BloomFilter(self._bucket_capacity, self._error_rate))
+        blooms[-1].add(envelope_id)
+        self._exact[envelope_id] = seen_at
+        self._exact.move_to_end(envelope_id)
+        while len(self._exact) > self._max_exact:
+            self._exact.popitem(last=False)
+
+    def _index(self, envelope_id: str, seen_at: float) -> None:
+        bucket = int(seen_at // self._bucket_sec)
+        self._persisted.setdefault(bucket, []).append(envelope_id)
+
+    async def _expire(self, now: float) -> None:
+        oldest = int(now // self._bucket_sec) - self._buckets
+        for bucket in [b for b in self._filters if b <= oldest]:
+            del self._filters[bucket]
+        while self._exact:
+            envelope_id, seen_at = next(iter(self._exact.items()))
+            if now - seen_at < self._window_sec:
+                break
+            del self._exact[envelope_id]
+        if self._store is not None:
+            for bucket in [b for b in self._persisted if b <= oldest]:
+                for envelope_id in self._persisted.pop(bucket):
+                    await self._store.delete(envelope_id)
+
+
+class DeduplicatingAgent(BaseAgent):
+    """
+    ``BaseAgent`` that hands each envelope to its handler at most once.
+
+    Redelivered envelopes are recognised by id and dropped before they reach
+    ``on_message`` or an RPC operation. They are still acknowledged, because
+    the runtime acks an at-least-once delivery before the handler runs, so the
+    sender stops retrying. An id is recorded only after its handler returned:
+    a message whose handler failed is handled again when it is redelivered,
+    while copies that arrive during handling are dropped.
+    """
+
+    def __init__(self, *args, dedup: Optional[DedupStore] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dedup = dedup or DedupStore()
+        self._in_progress: set[str] = set()
+        self.duplicates_skipped = 0
+
+    async def handle_message(
+        self, envelope: FameEnvelope, context: Optional[FameDeliveryContext] = None
+    ) -> Optional[FameMessageResponse | AsyncIterator[FameMessageResponse]]:
+        if not isinstance(envelope.frame, DataFrame) or not envelope.id:
+            return await super().handle_message(envelope, context)
+        if envelope.id in self._in_progress or await self.dedup.seen(envelope.id):
+            self.duplicates_skipped += 1
+            await self.on_duplicate(envelope)
+            return None
+
+        self._in_progress.add(envelope.id)
+        try:
+            result = await super().handle_message(envelope, context)
+            await self.dedup.add(envelope.id)
+            return result
+        finally:
+            self._in_progress.discard(envelope.id)
+
+    async def on_duplicate(self, envelope: FameEnvelope) -> Any:
+        """Called for every dropped duplicate; does nothing by default."""
@@ -0,0 +1,382 @@
+"""
+Benchmark the delivery profiles: sender -> sentinel -> agent message streams.
+
+    python delivery_benchmark.py --messages 2000 --loss 0,0.05
+
+Every combination of ``--delivery-profiles``, ``--storage-profiles`` (used by
+the agent) and ``--loss`` gets a fresh sentinel and agent process on
+localhost, started from this file, plus a client process that streams the
+messages. With loss > 0, ``FaultInjector`` drops that share of the client's
+data envelopes and of the agent's acks. The report has delivered messages and
+msgs/sec, end-to-end latency percentiles, retransmissions and agent storage
+writes per message.
+"""
+
+import argparse
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from common import AGENT_ADDR
+from fault_injector import FaultInjectionConfig, FaultInjector, FaultRule
+from naylence.fame.core import (
+    DataFrame,
+    FameDeliveryContext,
+    FameEnvelope,
+    FameFabric,
+)
+from naylence.fame.node.node_event_listener import NodeEventListener
+from naylence.fame.node.node_like import NodeLike
+from naylence.fame.service import operation
+from naylence.fame.storage.key_value_store import KeyValueStore
+
+from naylence.agent import Agent, BaseAgent, configs
+
+DELIVERY_PROFILES = ["at-most-once", "at-least-once"]
+STORAGE_PROFILES = ["memory", "sqlite", "encrypted-sqlite"]
+SENTINEL_URL = f"ws://localhost:{configs.SENTINEL_PORT}/fame/v1/attach/ws/downstream"
+# An unanswered stats() call otherwise waits out the RPC timeout; without
+# retries (at-most-once) one lost request or reply would stall the run.
+STATS_TIMEOUT_SEC = 2.0
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+_kv_writes = 0
+_in_kv_write: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "in_kv_write", default=False
+)
+
+
+def count_kv_writes() -> None:
+    """Count set/update/delete calls on every loaded ``KeyValueStore`` class."""
+
+    def wrap(method):
+        async def counted(self, *args, **kwargs):
+            global _kv_writes
+            if _in_kv_write.get():
+                # A store delegating to another one counts as a single write.
+                return await method(self, *args, **kwargs)
+            _kv_writes += 1
+            token = _in_kv_write.set(True)
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                _in_kv_write.reset(token)
+
+        return counted
+
+    pending = [KeyValueStore]
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        for name in ("set", "update", "delete"):
+            if name in cls.__dict__:
+                setattr(cls, name, wrap(cls.__dict__[name]))
+
+
+class BenchmarkAgent(BaseAgent):
+    def __init__(self):
+        super().__init__()
+        self._first_seen: dict[int, float] = {}
+        self._latencies_ms: list[float] = []
+        self._received = 0
+
+    async def start(self) -> None:
+        from naylence.fame.node.node import get_node
+
+        count_kv_writes()
+        if faults := FaultInjector.from_env():
+            get_node().add_event_listener(faults)
+
+    async def on_message(self, message: Any) -> None:
+        now = time.time()
+        self._received += 1
+        if message["seq"] not in self._first_seen:
+            self._first_seen[message["seq"]] = now
+            self._latencies_ms.append((now - message["sent_at"]) * 1000)
+
+    @operation
+    async def stats(self) -> dict:
+        return {
+            "received": self._received,
+            "unique": len(self._first_seen),
+            "last_at": max(self._first_seen.values(), default=0.0),
+            "latencies_ms": self._latencies_ms,
+            "storage_writes": _kv_writes,
+        }
+
+
+class _UpstreamDataCounter(NodeEventListener):
+    def __init__(self):
+        super().__init__()
+        self.sent = 0
+
+    @property
+    def priority(self) -> int:
+        # Ahead of the injector, so dropped copies count as sent too.
+        return -1
+
+    async def on_forward_upstream(
+        self,
+        node: NodeLike,
+        envelope: FameEnvelope,
+        context: FameDeliveryContext | None = None,
+    ) -> FameEnvelope | None:
+        if isinstance(envelope.frame, DataFrame):
+            self.sent += 1
+        return envelope
+
+
+async def fetch_stats(agent: Any, timeout_sec: float = 30.0) -> dict:
+    """``agent.stats()``, retried with a short timeout for up to ``timeout_sec``."""
+    deadline = time.monotonic() + timeout_sec
+    while True:
+        try:
+            return await asyncio.wait_for(agent.stats(), STATS_TIMEOUT_SEC)
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.5)
+
+
+async def run_client(args: argparse.Namespace) -> dict:
+    from naylence.fame.node.node import get_node
+
+    async with FameFabric.create(root_config=configs.CLIENT_CONFIG) as fabric:
+        agent = Agent.remote_by_address(AGENT_ADDR)
+        before = await fetch_stats(agent)
+
+        counter = _UpstreamDataCounter()
+        faults = FaultInjector.from_env()
+        get_node().add_event_listener(counter)
+        if faults:
+            get_node().add_event_listener(faults)
+
+        padding = "x" * args.payload_size
+        slots = asyncio.Semaphore(args.concurrency)
+        failed = 0
+
+        async def send(seq: int) -> None:
+            nonlocal failed
+            async with slots:
+                message = {"seq": seq, "sent_at": time.time(), "pad": padding}
+                try:
+                    await fabric.send_message(AGENT_ADDR, message)
+                except Exception:
+                    failed += 1
+
+        started = time.time()
+        await asyncio.gather(*(send(seq) for seq in range(args.messages)))
+        sent_for = time.time() - started
+
+        # RPCs below must not be dropped.
+        get_node().remove_event_listener(counter)
+        if faults:
+            get_node().remove_event_listener(faults)
+
+        # Wait for stragglers until everything arrived or nothing more does.
+        after = await fetch_stats(agent)
+        while after["unique"] - before["unique"] < args.messages:
+            unique = after["unique"]
+            await asyncio.sleep(args.settle_sec)
+            after = await fetch_stats(agent)
+            if after["unique"] == unique:
+                break
+
+    latencies = after["latencies_ms"][len(before["latencies_ms"]) :]
+    delivered = after["unique"] - before["unique"]
+    finished = max(after["last_at"], started + sent_for)
+    return {
+        "messages": args.messages,
+        "delivered": delivered,
+        "duplicates": after["received"] - before["received"] - delivered,
+        "failed_sends": failed,
+        "msgs_per_sec": delivered / (finished - started) if delivered else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies, default=0.0),
+        "retransmissions": counter.sent - args.messages,
+        "storage_writes": after["storage_writes"] - before["storage_writes"],
+    }
+
+
+@dataclass
+class RunResult:
+    delivery: str
+    storage: str
+    loss: float
+    report: Optional[dict]
+
+
+def wait_for_port(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(("localhost", port), timeout=0.5).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def write_fault_profile(directory: Path, frame: str, loss: float) -> str:
+    path = directory / f"faults-{frame}.json"
+    rule = FaultRule(hooks=["forward_upstream"], frames=[frame], drop_rate=loss)
+    path.write_text(FaultInjectionConfig(seed=42, rules=[rule]).model_dump_json())
+    return str(path)
+
+
+def run_combination(
+    delivery: str, storage: str, loss: float, args: argparse.Namespace
+) -> RunResult:
+    with tempfile.TemporaryDirectory(prefix="delivery-benchmark-") as tmp:
+        work = Path(tmp)
+        base = {
+            **os.environ,
+            "FAME_DELIVERY_PROFILE": delivery,
+            "FAME_DIRECT_ADMISSION_URL": SENTINEL_URL,
+            "FAME_STORAGE_PROFILE": "memory",
+        }
+        agent_env = {
+            **base,
+            "FAME_STORAGE_PROFILE": storage,
+            "FAME_STORAGE_DB_DIRECTORY": str(work / "agent"),
+            "FAME_STORAGE_MASTER_KEY": os.getenv(
+                "FAME_STORAGE_MASTER_KEY", secrets.token_hex(32)
+            ),
+        }
+        client_env = dict(base)
+        if loss > 0:
+            agent_env["FAULT_INJECTION"] = write_fault_profile(
+                work, "DeliveryAck", loss
+            )
+            client_env["FAULT_INJECTION"] = write_fault_profile(work, "Data", loss)
+
+        quiet = subprocess.DEVNULL
+        me = [sys.executable, __file__]
+        sentinel = subprocess.Popen(
+            [sys.executable, "sentinel.py"], env=base, stdout=quiet, stderr=quiet
+        )
+        agent = None
+        try:
+            wait_for_port(configs.SENTINEL_PORT)
+            agent = subprocess.Popen(
+                me + ["--role", "agent"], env=agent_env, stdout=quiet, stderr=quiet
+            )
+            client = subprocess.run(
+                me + ["--role", "client"] + sys.argv[1:],
+                env=client_env,
+                capture_output=True,
+                text=True,
+                timeout=args.run_timeout_sec,
+            )
+            lines = client.stdout.strip().splitlines()
+            report = json.loads(lines[-1]) if client.returncode == 0 and lines else None
+            if report is None:
+                print(client.stderr.strip()[-2000:], file=sys.stderr)
+        except subprocess.TimeoutExpired:
+            report = None
+        finally:
+            for process in (agent, sentinel):
+                if process is not None:
+                    process.terminate()
+                    try:
+                        process.wait(timeout=10)
+                    except subprocess.TimeoutExpired:
+                        process.kill()
+    return RunResult(delivery, storage, loss, report)
+
+
+def print_report(results: list[RunResult]) -> None:
+    header = (
+        f"{'delivery':<15}{'storage':<18}{'loss':>6}{'delivered':>11}"
+        f"{'msgs/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'retx':>7}{'dups':>6}{'writes/msg':>12}"
+    )
+    print()
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        prefix = f"{r.delivery:<15}{r.storage:<18}{r.loss:>6.0%}"
+        if r.report is None:
+            print(f"{prefix}  failed")
+            continue
+        m = r.report
+        print(
+            f"{prefix}{m['delivered']:>6}/{m['messages']:<4}"
+            f"{m['msgs_per_sec']:>9.0f}{m['p50_ms']:>9.1f}{m['p95_ms']:>9.1f}"
+            f"{m['p99_ms']:>9.1f}{m['retransmissions']:>7}{m['duplicates']:>6}"
+            f"{m['storage_writes'] / m['messages']:>12.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--delivery-profiles", default=",".join(DELIVERY_PROFILES))
+    parser.add_argument("--storage-profiles", default=",".join(STORAGE_PROFILES))
+    parser.add_argument(
+        "--loss", default="0,0.05", help="Comma-separated drop rates to inject"
+    )
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument(
+        "--concurrency", type=int, default=32, help="Messages awaiting an ack"
+    )
+    parser.add_argument(
+        "--payload-size", type=int, default=256, help="Padding bytes per message"
+    )
+    parser.add_argument(
+        "--settle-sec",
+        type=float,
+        default=2.0,
+        help="Wait this long for late messages before giving up on the rest",
+    )
+    parser.add_argument("--run-timeout-sec", type=float, default=600)
+    parser.add_argument("--role", choices=["agent", "client"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.role == "agent":
+        asyncio.run(
+            BenchmarkAgent().aserve(AGENT_ADDR, root_config=configs.NODE_CONFIG)
+        )
+        return
+    if args.role == "client":
+        print(json.dumps(asyncio.run(run_client(args))))
+        return
+
+    results = []
+    for delivery, storage, loss in itertools.product(
+        args.delivery_profiles.split(","),
+        args.storage_profiles.split(","),
+        [float(x) for x in args.loss.split(",")],
+    ):
+        if delivery not in DELIVERY_PROFILES:
+            parser.error(f"Unknown delivery profile: {delivery}")
+        if storage not in STORAGE_PROFILES:
+            parser.error(f"Unknown storage profile: {storage}")
+        print(f"Running {delivery} / {storage} / {loss:.0%} loss...")
+        results.append(run_combination(delivery, storage, loss, args))
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
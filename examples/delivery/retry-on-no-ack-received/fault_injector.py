@@ -0,0 +1,277 @@
+import asyncio
+import os
+import random
+from collections import Counter
+from typing import Awaitable, Callable, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from naylence.fame.node.node_event_listener import NodeEventListener
+
+from naylence.fame.node.node_like import NodeLike
+
+from naylence.fame.core import (
+    FameAddress,
+    FameDeliveryContext,
+    FameEnvelope,
+)
+
+Hook = Literal[
+    "deliver",
+    "deliver_local",
+    "forward_upstream",
+    "forward_to_route",
+    "forward_to_peer",
+    "forward_to_peers",
+]
+
+
+class LatencyConfig(BaseModel):
+    """
+    Delay added to each matching envelope, in milliseconds.
+
+    ``fixed`` always waits ``ms``; ``uniform`` waits ``ms ± jitter_ms``;
+    ``normal`` has mean ``ms`` and standard deviation ``jitter_ms``;
+    ``lognormal`` has median ``ms`` and shape ``sigma``; ``pareto`` waits at
+    least ``ms`` with a heavy tail of shape ``alpha``. ``max_ms`` caps it.
+    """
+
+    distribution: Literal["fixed", "uniform", "normal", "lognormal", "pareto"] = "fixed"
+    ms: float = 0.0
+    jitter_ms: float = 0.0
+    sigma: float = 0.5
+    alpha: float = 2.0
+    max_ms: Optional[float] = None
+
+    def sample(self, rng: random.Random) -> float:
+        if self.distribution == "uniform":
+            delay = rng.uniform(self.ms - self.jitter_ms, self.ms + self.jitter_ms)
+        elif self.distribution == "normal":
+            delay = rng.gauss(self.ms, self.jitter_ms)
+        elif self.distribution == "lognormal":
+            delay = self.ms * rng.lognormvariate(0.0, self.sigma)
+        elif self.distribution == "pareto":
+            delay = self.ms * rng.paretovariate(self.alpha)
+        else:
+            delay = self.ms
+        if self.max_ms is not None:
+            delay = min(delay, self.max_ms)
+        return max(delay, 0.0)
+
+
+class FaultRule(BaseModel):
+    """
+    Faults applied to envelopes passing one of ``hooks`` with a frame type in
+    ``frames`` (e.g. ``"Data"``, ``"DeliveryAck"``); ``"*"`` matches any.
+    """
+
+    hooks: list[Hook | Literal["*"]] = Field(default_factory=lambda: ["*"])
+    frames: list[str] = Field(default_factory=lambda: ["*"])
+    drop_rate: float = 0.0
+    duplicate_rate: float = 0.0
+    reorder_rate: float = 0.0
+    reorder_delay_ms: float = 50.0
+    latency: Optional[LatencyConfig] = None
+    bandwidth_bytes_per_sec: Optional[int] = None
+
+    def matches(self, hook: str, frame_type: str) -> bool:
+        return ("*" in self.hooks or hook in self.hooks) and (
+            "*" in self.frames or frame_type in self.frames
+        )
+
+
+class FaultInjectionConfig(BaseModel):
+    seed: int = 0
+    rules: list[FaultRule] = Field(default_factory=list)
+
+
+class FaultInjector(NodeEventListener):
+    """
+    Drops, delays, reorders, duplicates and rate-limits envelopes on the node's
+    delivery and forwarding hooks, as configured by ``FaultInjectionConfig``.
+
+    Each envelope is handled by the first rule matching its hook and frame
+    type. Delayed, reordered and duplicated envelopes are held back and then
+    passed to the same node operation again, and later envelopes can overtake
+    them. That runs every listener ahead of the injector a second time, so it
+    has priority 0 and comes before the node's own listeners (the delivery
+    tracker, security, telemetry): they see each envelope once, after its
+    faults. A listener added with priority 0 or lower would see it twice.
+    ``bandwidth_bytes_per_sec`` queues the envelopes of a rule behind each other
+    by their serialized size.
+
+    All random choices come from one generator seeded with ``seed``, so the same
+    sequence of envelopes meets the same faults on every run. ``stats`` counts
+    what was done.
+    """
+
+    def __init__(self, config: FaultInjectionConfig):
+        super().__init__()
+        self._rules = config.rules
+        self._random = random.Random(config.seed)
+        self._link_free_at: dict[int, float] = {}
+        self._released: set[int] = set()
+        self._holds: set[asyncio.Task] = set()
+        self.stats: Counter[str] = Counter()
+
+    @property
+    def priority(self) -> int:
+        return 0
+
+    @classmethod
+    def from_env(cls, name: str = "FAULT_INJECTION") -> Optional["FaultInjector"]:
+        """Injector configured by the JSON file named in ``name``, if it is set."""
+        path = os.getenv(name)
+        if not path:
+            return None
+        with open(path) as f:
+            return cls(FaultInjectionConfig.model_validate_json(f.read()))
+
+    async def on_deliver(
+        self,
+        node: NodeLike,
+        envelope: FameEnvelope,
+        context: FameDeliveryContext | None,
+    ) -> FameEnvelope | None:
+        return self._inject("deliver", envelope, lambda env: node.deliver(env, context))
+
+    async def on_deliver_local(
+        self,
+        node: NodeLike,
+        address: FameAddress,
+        envelope: FameEnvelope,
+        context: FameDeliveryContext | None = None,
+    ) -> FameEnvelope | None:
+        return self._inject(
+            "deliver_local",
+            envelope,
+            lambda env: node.deliver_local(address, env, context),
+        )
+
+    async def on_forward_upstream(
+        self,
+        node: NodeLike,
+        envelope: FameEnvelope,
+        context: FameDeliveryContext | None = None,
+    ) -> FameEnvelope | None:
+        return self._inject(
+            "forward_upstream",
+            envelope,
+            lambda env: node.forward_upstream(env, context),
+        )
+
+    async def on_forward_to_route(
+        self,
+        node: NodeLike,
+        next_segment: str,
+        envelope: FameEnvelope,
+        context: FameDeliveryContext | None = None,
+    ) -> FameEnvelope | None:
+        return self._inject(
+            "forward_to_route",
+            envelope,
+            lambda env: node.forward_to_route(next_segment, env, context),  # type: ignore
+        )
+
+    async def on_forward_to_peer(
+        self,
+        node: NodeLike,
+        peer_segment: str,
+        envelope: FameEnvelope,
+        context: FameDeliveryContext | None = None,
+    ) -> FameEnvelope | None:
+        return self._inject(
+            "forward_to_peer",
+            envelope,
+            lambda env: node.forward_to_peer(peer_segment, env, context),  # type: ignore
+        )
+
+    async def on_forward_to_peers(
+        self,
+        node: NodeLike,
+        envelope: FameEnvelope,
+        peers,
+        exclude_peers,
+        context: FameDeliveryContext | None = None,
+    ) -> FameEnvelope | None:
+        return self._inject(
+            "forward_to_peers",
+            envelope,
+            lambda env: node.forward_to_peers(env, peers, exclude_peers, context),  # type: ignore
+        )
+
+    async def on_node_stopped(self, node: NodeLike) -> None:
+        for hold in list(self._holds):
+            hold.cancel()
+
+    def _inject(
+        self,
+        hook: str,
+        envelope: FameEnvelope,
+        resend: Callable[[FameEnvelope], Awaitable[None]],
+    ) -> FameEnvelope | None:
+        if id(envelope) in self._released:
+            # Second pass of an envelope held back earlier.
+            self._released.discard(id(envelope))
+            return envelope
+
+        frame_type = getattr(envelope.frame, "type", type(envelope.frame).__name__)
+        index, rule = next(
+            ((i, r) for i, r in enumerate(self._rules) if r.matches(hook, frame_type)),
+            (-1, None),
+        )
+        if rule is None:
+            return envelope
+        rng = self._random
+        self.stats["matched"] += 1
+
+        if rng.random() < rule.drop_rate:
+            self.stats["dropped"] += 1
+            return None
+
+        delay_ms = rule.latency.sample(rng) if rule.latency else 0.0
+        if rng.random() < rule.reorder_rate:
+            self.stats["reordered"] += 1
+            delay_ms += rule.reorder_delay_ms
+        if rule.bandwidth_bytes_per_sec:
+            delay_ms += self._queue_delay_ms(index, rule, envelope)
+
+        if rng.random() < rule.duplicate_rate:
+            self.stats["duplicated"] += 1
+            self._hold(envelope.model_copy(), resend, delay_ms)
+
+        if delay_ms <= 0:
+            return envelope
+        self.stats["delayed"] += 1
+        self.stats["delay_ms"] += int(delay_ms)
+        self._hold(envelope, resend, delay_ms)
+        return None
+
+    def _queue_delay_ms(
+        self, index: int, rule: FaultRule, envelope: FameEnvelope
+    ) -> float:
+        assert rule.bandwidth_bytes_per_sec
+        now = asyncio.get_running_loop().time()
+        size = len(envelope.model_dump_json(by_alias=True, exclude_none=True))
+        start = max(now, self._link_free_at.get(index, now))
+        done = start + size / rule.bandwidth_bytes_per_sec
+        self._link_free_at[index] = done
+        return (done - now) * 1000
+
+    def _hold(
+        self,
+        envelope: FameEnvelope,
+        resend: Callable[[FameEnvelope], Awaitable[None]],
+        delay_ms: float,
+    ) -> None:
+        async def release() -> None:
+            await asyncio.sleep(delay_ms / 1000)
+            self._released.add(id(envelope))
+            try:
+                await resend(envelope)
+            finally:
+                self._released.discard(id(envelope))
+
+        hold = asyncio.create_task(release())
+        self._holds.add(hold)
+        hold.add_done_callback(self._holds.discard)
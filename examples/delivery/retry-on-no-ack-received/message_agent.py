@@ -1,16 +1,26 @@
 import asyncio
+import os
 from typing import Any, Optional
 
 
+from ack_batching import AckBatcher
+from dedup_store import DedupStore, DeduplicatingAgent, SeenEnvelope
+from fault_injector import FaultInjector
 from lost_ack_simulator import LostAckSimulator
 from common import AGENT_ADDR
 from naylence.fame.core import (
+    FameEnvelope,
     FameMessageResponse,
 )
-from naylence.agent import BaseAgent, configs
+from naylence.agent import configs
 
 
-class MessageAgent(BaseAgent):
+class MessageAgent(DeduplicatingAgent):
+    def __init__(self):
+        super().__init__(
+            dedup=DedupStore(window_sec=float(os.getenv("DEDUP_WINDOW_SEC", "300")))
+        )
+
     async def start(self) -> None:
         """
         Sets up event handling for lost acknowledgments for demonstration purposes.
@@ -18,11 +28,34 @@ class MessageAgent(BaseAgent):
         """
         from naylence.fame.node.node import get_node
 
-        get_node().add_event_listener(LostAckSimulator())
+        # FAULT_INJECTION names a fault profile that replaces the fixed ack loss.
+        get_node().add_event_listener(FaultInjector.from_env() or LostAckSimulator())
+
+        # Optional: acknowledge deliveries in batches instead of one by one.
+        ack_batch_size = int(os.getenv("ACK_BATCH_SIZE", "0"))
+        if ack_batch_size > 1:
+            get_node().add_event_listener(
+                AckBatcher(
+                    max_batch=ack_batch_size,
+                    max_delay_ms=int(os.getenv("ACK_BATCH_DELAY_MS", "50")),
+                )
+            )
+
+        # Optional: keep the ids of handled messages across restarts.
+        if os.getenv("DEDUP_PERSIST", "false").lower() == "true":
+            assert self.storage_provider is not None
+            await self.dedup.open(
+                await self.storage_provider.get_kv_store(
+                    SeenEnvelope, namespace="message_agent_dedup"
+                )
+            )
 
     async def on_message(self, message: Any) -> Optional[FameMessageResponse]:
         print("MessageAgent received message:", message)
 
+    async def on_duplicate(self, envelope: FameEnvelope) -> None:
+        print("MessageAgent skipped duplicate of envelope id", envelope.id)
+
 
 if __name__ == "__main__":
     asyncio.run(
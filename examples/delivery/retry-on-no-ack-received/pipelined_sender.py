@@ -0,0 +1,84 @@
+import asyncio
+from typing import Any, Optional
+
+from naylence.fame.core import DeliveryAckFrame, FameFabric
+
+
+class SkippedDeliveryError(Exception):
+    """An earlier message with the same ordering key was not delivered."""
+
+
+class PipelinedSender:
+    """
+    Keeps up to ``window`` messages to one address in flight at once.
+
+    ``fabric.send_message`` returns only once the message is acked, so a caller
+    that awaits each send gets one message per round-trip. ``send`` instead
+    returns as soon as the message has a slot in the window, with a future
+    that resolves to its ``DeliveryAckFrame``. Acks are matched per message and
+    may arrive in any order; retransmissions of unacked messages are still
+    handled by the runtime's sender retry policy.
+
+    Messages sent with the same ``key`` are delivered in order: each waits for
+    the previous one's ack before it is sent. If one of them fails, the rest of
+    that key's queue fails with ``SkippedDeliveryError`` rather than overtake it.
+    """
+
+    def __init__(self, fabric: FameFabric, address: str, *, window: int = 32):
+        self._fabric = fabric
+        self._address = address
+        self._slots = asyncio.Semaphore(window)
+        self._in_flight = 0
+        self._pending: set[asyncio.Task] = set()
+        self._tails: dict[str, asyncio.Task] = {}
+        self.sent = 0
+        self.acked = 0
+        self.failed = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def send(
+        self, message: Any, *, key: Optional[str] = None
+    ) -> "asyncio.Future[Optional[DeliveryAckFrame]]":
+        """Wait for a free slot and start sending; the future resolves on ack."""
+        await self._slots.acquire()
+        self._in_flight += 1
+        previous = self._tails.get(key) if key is not None else None
+        task = asyncio.create_task(self._deliver(message, previous))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        if key is not None:
+            self._tails[key] = task
+            task.add_done_callback(lambda t: self._drop_tail(key, t))
+        return task
+
+    async def flush(self) -> None:
+        """Wait until every message sent so far is acked or has failed."""
+        await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    async def _deliver(
+        self, message: Any, previous: Optional[asyncio.Task]
+    ) -> Optional[DeliveryAckFrame]:
+        try:
+            if previous is not None:
+                await asyncio.wait([previous])
+                if previous.cancelled() or previous.exception() is not None:
+                    raise SkippedDeliveryError(
+                        "Previous message with the same key was not delivered"
+                    )
+            self.sent += 1
+            ack = await self._fabric.send_message(self._address, message)
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+        self.acked += 1
+        return ack
+
+    def _drop_tail(self, key: str, task: asyncio.Task) -> None:
+        if self._tails.get(key) is task:
+            del self._tails[key]
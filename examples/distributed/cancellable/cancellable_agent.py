@@ -1,31 +1,32 @@
 import asyncio
 
+from cancellation import CancellableTaskAgent, CancellationToken
 from common import AGENT_ADDR
 
 from naylence.agent import (
     Artifact,
-    BackgroundTaskAgent,
     DataPart,
     TaskSendParams,
-    TaskState,
     configs,
 )
 
 
-class CancellableAgent(BackgroundTaskAgent):
-    async def run_background_task(self, params: TaskSendParams) -> None:
+class CancellableAgent(CancellableTaskAgent):
+    async def run_cancellable_task(
+        self, params: TaskSendParams, token: CancellationToken
+    ) -> None:
         max_steps = 10
         for i in range(1, max_steps):
-            task_state = await self.get_task_state(params.id)
-            if task_state == TaskState.CANCELED:
-                break
             progress = i / max_steps
             print(f"Task {params.id} progress changed to: {progress}")
             await self.update_task_artifact(
                 params.id,
                 Artifact(parts=[DataPart(data={"progress": progress})]),
             )
-            await asyncio.sleep(0.5)
+            # wakes up as soon as the task is canceled
+            if await token.sleep(0.5):
+                print(f"Task {params.id} canceled")
+                break
 
 
 if __name__ == "__main__":
@@ -0,0 +1,102 @@
+import asyncio
+from abc import abstractmethod
+from typing import Any, Optional
+
+from naylence.agent import (
+    BackgroundTaskAgent,
+    Message,
+    Task,
+    TaskSendParams,
+    TaskState,
+)
+
+
+class CancellationToken:
+    """Set by the agent as soon as its task is canceled; nothing is polled."""
+
+    def __init__(self):
+        self._cancelled = asyncio.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    async def wait(self) -> None:
+        await self._cancelled.wait()
+
+    async def sleep(self, seconds: float) -> bool:
+        """Sleep up to ``seconds``, waking early on cancel; True if canceled."""
+        try:
+            await asyncio.wait_for(self._cancelled.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+        return self.cancelled
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise asyncio.CancelledError()
+
+
+class CancellableTaskAgent(BackgroundTaskAgent):
+    """
+    ``BackgroundTaskAgent`` that pushes cancellation into its running tasks.
+
+    Subclasses implement ``run_cancellable_task(params, token)``. The token is
+    set the moment the task becomes ``CANCELED``, by ``cancel_task`` or by the
+    max task lifetime, so the task can check ``token.cancelled`` for free or
+    wait on it (``token.sleep``) instead of looking up its state every step.
+
+    With ``interrupt_on_cancel`` the task is also interrupted with
+    ``CancelledError`` at whatever it is awaiting, which stops it even in the
+    middle of a long call; the error ends the task quietly as canceled.
+    """
+
+    def __init__(self, *args, interrupt_on_cancel: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._interrupt_on_cancel = interrupt_on_cancel
+        self._tokens: dict[str, CancellationToken] = {}
+        self._runners: dict[str, asyncio.Task] = {}
+
+    @abstractmethod
+    async def run_cancellable_task(
+        self, params: TaskSendParams, token: CancellationToken
+    ) -> Any: ...
+
+    async def start_task(self, params: TaskSendParams) -> Task:
+        # Created before the task runs, so an early cancel is not missed.
+        self._tokens[params.id] = CancellationToken()
+        return await super().start_task(params)
+
+    async def run_background_task(self, params: TaskSendParams) -> Any:
+        token = self._tokens.setdefault(params.id, CancellationToken())
+        runner = asyncio.current_task()
+        assert runner
+        self._runners[params.id] = runner
+        try:
+            if token.cancelled:
+                return None
+            return await self.run_cancellable_task(params, token)
+        except asyncio.CancelledError:
+            if not token.cancelled:
+                raise  # e.g. the node is stopping
+            runner.uncancel()
+            return None
+        finally:
+            self._tokens.pop(params.id, None)
+            self._runners.pop(params.id, None)
+
+    async def update_task_state(
+        self, task_id: str, state: TaskState, message: Optional[Message] = None
+    ) -> bool:
+        updated = await super().update_task_state(task_id, state, message)
+        if updated and state == TaskState.CANCELED:
+            token = self._tokens.get(task_id)
+            if token is not None:
+                token.cancel()
+            runner = self._runners.get(task_id)
+            if self._interrupt_on_cancel and runner is not None:
+                runner.cancel()
+        return updated
@@ -0,0 +1,359 @@
+"""
+Benchmark the sentinel's capability routing as the number of agents grows.
+
+    python capability_benchmark.py --agents 100,1000,10000 --catalog 1000
+
+For every agent count, that many simulated agents attach to an in-process
+sentinel routing table: each gets a child route of its own and advertises
+``AGENT_CAPABILITY`` plus a random subset of a catalog of ``--catalog``
+capabilities, as ``MathAgent`` does, through the sentinel's own
+``CapabilityFrameHandler``. The benchmark then measures
+
+* the cost of an attach (advertise) and of churn, one agent detaching
+  (withdraw, route removed) and another attaching in its place;
+* capability lookup latency of the stock ``CapabilityAwareRoutingPolicy`` and
+  of ``CachedCapabilityRoutingPolicy``, for queries of one to three catalog
+  capabilities plus ``AGENT_CAPABILITY`` drawn from a pool of
+  ``--distinct-queries``, and the cache hit rate with churn going on;
+* the memory held by the capability index and by the resolution cache.
+
+No sockets or agent processes are involved, so the numbers are the
+sentinel's routing work alone, without transport.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from capability_cache import CachedCapabilityRoutingPolicy
+from load_aware import LoadAwareStrategy
+from naylence.fame.core import (
+    AGENT_CAPABILITY,
+    CapabilityAdvertiseFrame,
+    CapabilityWithdrawFrame,
+    DataFrame,
+    DeliveryOriginType,
+    FameDeliveryContext,
+    FameEnvelope,
+    create_fame_envelope,
+    format_address,
+)
+from naylence.fame.node.node_envelope_factory import NodeEnvelopeFactory
+from naylence.fame.node.node_event_listener import NodeEventListener
+from naylence.fame.sentinel.capability_aware_routing_policy import (
+    CapabilityAwareRoutingPolicy,
+)
+from naylence.fame.sentinel.capability_frame_handler import CapabilityFrameHandler
+from naylence.fame.sentinel.load_balancing.hrw_load_balancing_strategy import (
+    HRWLoadBalancingStrategy,
+)
+from naylence.fame.sentinel.router import ForwardChild, RouterState, RoutingAction
+from naylence.fame.sentinel.routing_policy import RoutingPolicy
+
+SELECTIONS = ["hrw", "p2c", "ewma", "least-outstanding"]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def make_strategy(selection: str):
+    if selection == "hrw":
+        return HRWLoadBalancingStrategy()
+    return LoadAwareStrategy(selection)  # type: ignore
+
+
+class _RoutingTable:
+    """
+    The part of a sentinel that capability routing touches: child routes, the
+    capability frame handler and the node event listeners, which see the
+    frames as a ``Sentinel`` would dispatch them.
+    """
+
+    def __init__(self):
+        self.downstream_routes: dict[str, Any] = {}
+        self.listeners: list[NodeEventListener] = []
+        self.envelope_factory = NodeEnvelopeFactory(
+            physical_path_fn=lambda: "/benchmark", sid_fn=lambda: "benchmark"
+        )
+        self.handler = CapabilityFrameHandler(
+            routing_node=self,  # type: ignore
+            route_manager=self,  # type: ignore
+            upstream_connector=lambda: None,
+        )
+        self.state = RouterState(
+            node_id="benchmark",
+            local=set(),
+            downstream_address_routes={},
+            child_segments=set(),
+            peer_segments=set(),
+            has_parent=False,
+            physical_segments=["benchmark"],
+            pools={},
+            capabilities=self.handler.cap_routes,
+            resolve_address_by_capability=self._resolve_locally,
+        )
+
+    @staticmethod
+    async def _resolve_locally(capabilities: list[str]) -> Optional[str]:
+        return None  # the sentinel hosts no services of its own
+
+    async def attach(self, segment: str, capabilities: list[str]) -> None:
+        self.downstream_routes[segment] = None
+        self.state.child_segments.add(segment)
+        frame = CapabilityAdvertiseFrame(
+            capabilities=capabilities, address=self._address_of(segment)
+        )
+        envelope = await self._deliver(frame, segment)
+        if envelope is not None:
+            await self.handler.accept_capability_advertise(
+                envelope, self._context(segment)
+            )
+
+    async def detach(self, segment: str, capabilities: list[str]) -> None:
+        frame = CapabilityWithdrawFrame(
+            capabilities=capabilities, address=self._address_of(segment)
+        )
+        envelope = await self._deliver(frame, segment)
+        if envelope is not None:
+            await self.handler.accept_capability_withdraw(
+                envelope, self._context(segment)
+            )
+        del self.downstream_routes[segment]
+        self.state.child_segments.discard(segment)
+
+    async def _deliver(self, frame, segment: str) -> Optional[FameEnvelope]:
+        envelope: Optional[FameEnvelope] = create_fame_envelope(frame=frame)
+        for listener in self.listeners:
+            if envelope is None:
+                break
+            envelope = await listener.on_deliver(self, envelope, self._context(segment))  # type: ignore
+        return envelope
+
+    async def forward_to_route(
+        self,
+        next_segment: str,
+        envelope: FameEnvelope,
+        context: Optional[FameDeliveryContext] = None,
+    ) -> None:
+        for listener in self.listeners:
+            await listener.on_forward_to_route(self, next_segment, envelope, context)  # type: ignore
+
+    async def forward_upstream(self, envelope, context=None) -> None:
+        pass
+
+    @staticmethod
+    def _address_of(segment: str):
+        return format_address(f"agent-{segment}", f"/{segment}")
+
+    @staticmethod
+    def _context(segment: str) -> FameDeliveryContext:
+        return FameDeliveryContext(
+            from_system_id=segment, origin_type=DeliveryOriginType.DOWNSTREAM
+        )
+
+
+@dataclass
+class RunResult:
+    agents: int
+    attach_us: float
+    churn_us: float
+    stock_p50_us: float
+    stock_p99_us: float
+    cached_p50_us: float
+    cached_p99_us: float
+    hit_rate_under_churn: float
+    index_bytes: int
+    cache_bytes: int
+
+
+class _Workload:
+    def __init__(self, args: argparse.Namespace, agents: int):
+        self._rng = random.Random(args.seed)
+        self._catalog = [f"bench.capability.{i}" for i in range(args.catalog)]
+        self._max_per_agent = args.max_capabilities_per_agent
+        self._next_segment = 0
+        self.agents: dict[str, list[str]] = {}
+        for _ in range(agents):
+            self.new_agent()
+        self.queries = [self._query() for _ in range(args.distinct_queries)]
+
+    def new_agent(self) -> tuple[str, list[str]]:
+        segment = f"node-{self._next_segment}"
+        self._next_segment += 1
+        count = self._rng.randint(1, self._max_per_agent)
+        capabilities = [AGENT_CAPABILITY, *self._rng.sample(self._catalog, count)]
+        self.agents[segment] = capabilities
+        return segment, capabilities
+
+    def random_agent(self) -> tuple[str, list[str]]:
+        segment = self._rng.choice(list(self.agents))
+        return segment, self.agents[segment]
+
+    def random_query(self) -> list[str]:
+        return self._rng.choice(self.queries)
+
+    def _query(self) -> list[str]:
+        # Satisfiable by at least the agent it was drawn from.
+        _, capabilities = self.random_agent()
+        catalog = capabilities[1:]
+        return [
+            AGENT_CAPABILITY,
+            *self._rng.sample(catalog, self._rng.randint(1, min(3, len(catalog)))),
+        ]
+
+
+def _lookup(capabilities: list[str]) -> FameEnvelope:
+    return create_fame_envelope(
+        frame=DataFrame(payload=None), capabilities=capabilities
+    )
+
+
+async def _timed_decide(
+    policy: RoutingPolicy, table: _RoutingTable, envelope: FameEnvelope
+) -> float:
+    started = time.perf_counter_ns()
+    action: RoutingAction = await policy.decide(envelope, table.state)
+    elapsed = (time.perf_counter_ns() - started) / 1000
+    assert isinstance(action, ForwardChild), action
+    return elapsed
+
+
+async def run_agent_count(agents: int, args: argparse.Namespace) -> RunResult:
+    workload = _Workload(args, agents)
+    table = _RoutingTable()
+    stock = CapabilityAwareRoutingPolicy(make_strategy(args.selection))
+    cached = CachedCapabilityRoutingPolicy(
+        load_balancing_strategy=make_strategy(args.selection),
+        ttl_sec=args.cache_ttl_sec,
+    )
+    table.listeners.append(cached)
+
+    started = time.perf_counter()
+    for segment, capabilities in list(workload.agents.items()):
+        await table.attach(segment, capabilities)
+    attach_us = (time.perf_counter() - started) * 1e6 / agents
+
+    stock_us, cached_us = [], []
+    for _ in range(args.lookups):
+        envelope = _lookup(workload.random_query())
+        stock_us.append(await _timed_decide(stock, table, envelope))
+        cached_us.append(await _timed_decide(cached, table, envelope))
+
+    # Churn, with lookups in between to see what invalidation costs the cache.
+    # Queries drawn from agents churned away may no longer resolve.
+    cached.stats.clear()
+    churn_ns = 0
+    for _ in range(args.churn):
+        segment, capabilities = workload.random_agent()
+        del workload.agents[segment]
+        new_segment, new_capabilities = workload.new_agent()
+        churn_started = time.perf_counter_ns()
+        await table.detach(segment, capabilities)
+        await table.attach(new_segment, new_capabilities)
+        churn_ns += time.perf_counter_ns() - churn_started
+        for _ in range(args.lookups_per_churn):
+            await cached.decide(_lookup(workload.random_query()), table.state)
+    lookups = cached.stats["hits"] + cached.stats["misses"]
+
+    index_bytes, cache_bytes = await _measure_memory(args, agents)
+    return RunResult(
+        agents=agents,
+        attach_us=attach_us,
+        churn_us=churn_ns / 1000 / max(args.churn, 1),
+        stock_p50_us=percentile(stock_us, 50),
+        stock_p99_us=percentile(stock_us, 99),
+        cached_p50_us=percentile(cached_us, 50),
+        cached_p99_us=percentile(cached_us, 99),
+        hit_rate_under_churn=cached.stats["hits"] / lookups if lookups else 0.0,
+        index_bytes=index_bytes,
+        cache_bytes=cache_bytes,
+    )
+
+
+async def _measure_memory(args: argparse.Namespace, agents: int) -> tuple[int, int]:
+    # A separate pass: tracing allocations would skew the timings above.
+    workload = _Workload(args, agents)
+    tracemalloc.start()
+    try:
+        table = _RoutingTable()
+        baseline = tracemalloc.get_traced_memory()[0]
+        for segment, capabilities in workload.agents.items():
+            await table.attach(segment, capabilities)
+        indexed = tracemalloc.get_traced_memory()[0]
+        cached = CachedCapabilityRoutingPolicy(
+            load_balancing_strategy=HRWLoadBalancingStrategy(),
+            ttl_sec=args.cache_ttl_sec,
+        )
+        for query in workload.queries:
+            await cached.decide(_lookup(query), table.state)
+        filled = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return indexed - baseline, max(filled - indexed, 0)
+
+
+def print_report(results: list[RunResult]) -> None:
+    header = (
+        f"{'agents':>8}{'attach us':>11}{'churn us':>10}"
+        f"{'stock p50':>11}{'p99':>9}{'cached p50':>12}{'p99':>9}"
+        f"{'hits':>7}{'index MB':>10}{'B/agent':>9}{'cache KB':>10}"
+    )
+    print()
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r.agents:>8}{r.attach_us:>11.1f}{r.churn_us:>10.1f}"
+            f"{r.stock_p50_us:>11.1f}{r.stock_p99_us:>9.1f}"
+            f"{r.cached_p50_us:>12.1f}{r.cached_p99_us:>9.1f}"
+            f"{r.hit_rate_under_churn:>7.0%}{r.index_bytes / 2**20:>10.1f}"
+            f"{r.index_bytes / r.agents:>9.0f}{r.cache_bytes / 1024:>10.1f}"
+        )
+    print("\nLatencies in microseconds per attach, churn step and lookup.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--agents", default="100,1000,5000", help="Comma-separated agent counts"
+    )
+    parser.add_argument(
+        "--catalog", type=int, default=1000, help="Distinct capabilities in use"
+    )
+    parser.add_argument("--max-capabilities-per-agent", type=int, default=8)
+    parser.add_argument("--distinct-queries", type=int, default=200)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument(
+        "--churn", type=int, default=500, help="Agents replaced after the lookups"
+    )
+    parser.add_argument("--lookups-per-churn", type=int, default=10)
+    parser.add_argument("--cache-ttl-sec", type=float, default=30.0)
+    parser.add_argument(
+        "--selection",
+        choices=SELECTIONS,
+        default="hrw",
+        help="Strategy choosing among the matching providers",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if args.max_capabilities_per_agent > args.catalog:
+        parser.error("--max-capabilities-per-agent exceeds --catalog")
+
+    results = []
+    for agents in [int(x) for x in args.agents.split(",")]:
+        print(f"Running {agents} agents...")
+        results.append(asyncio.run(run_agent_count(agents, args)))
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import bisect
+import time
+from collections import Counter
+from typing import Optional
+
+from naylence.fame.core import (
+    DataFrame,
+    FameAddress,
+    FameDeliveryContext,
+    FameEnvelope,
+)
+from naylence.fame.node.node_event_listener import NodeEventListener
+from naylence.fame.node.node_like import NodeLike
+from naylence.fame.sentinel.capability_aware_routing_policy import (
+    CapabilityAwareRoutingPolicy,
+)
+from naylence.fame.sentinel.composite_routing_policy import CompositeRoutingPolicy
+from naylence.fame.sentinel.load_balancing.load_balancing_strategy import (
+    LoadBalancingStrategy,
+)
+from naylence.fame.sentinel.router import (
+    DeliverLocal,
+    Drop,
+    ForwardChild,
+    ForwardUp,
+    RouterState,
+    RoutingAction,
+)
+
+
+class _Resolution:
+    def __init__(
+        self, local_address: Optional[str], segments: list[str], expires_at: float
+    ):
+        self.local_address = local_address
+        self.segments = segments
+        self.expires_at = expires_at
+
+
+class CachedCapabilityRoutingPolicy(CapabilityAwareRoutingPolicy, NodeEventListener):
+    """
+    ``CapabilityAwareRoutingPolicy`` that caches who provides a set of
+    capabilities.
+
+    The stock policy resolves every capability-addressed envelope from
+    scratch: it looks up the sentinel's local services and intersects the
+    providers of each capability. This one does that once per capability set
+    and reuses the answer for ``ttl_sec``. Intersections start from the
+    capability with the fewest providers in the sentinel's capability index
+    (capability -> provider address -> child segment), so they stay cheap
+    with many capabilities and agents.
+
+    Entries follow the index as a node event listener: when a child's
+    advertise makes it a provider of a cached set, it is added to the entry;
+    when a child withdraws a capability, only the entries it provided are
+    dropped. Other entries stay, however common the capability (every agent
+    advertises ``AGENT_CAPABILITY``). An entry naming a child that has since
+    detached is resolved again, and the TTL bounds anything else. ``stats``
+    counts hits, misses, updates and invalidations.
+    """
+
+    def __init__(self, *args, ttl_sec: float = 30.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._ttl_sec = ttl_sec
+        self._cache: dict[frozenset[str], _Resolution] = {}
+        self._keys_by_capability: dict[str, set[frozenset[str]]] = {}
+        # The sentinel's capability index, as last seen in a RouterState.
+        self._index: Optional[dict[str, dict[FameAddress, str]]] = None
+        self.stats: Counter[str] = Counter()
+
+    async def decide(
+        self,
+        envelope: FameEnvelope,
+        state: RouterState,
+        context: Optional[FameDeliveryContext] = None,
+    ) -> RoutingAction:
+        capabilities = envelope.capabilities
+        if envelope.to or not isinstance(envelope.frame, DataFrame) or not capabilities:
+            return Drop()
+
+        resolution = await self._resolve(capabilities, state)
+        if resolution.local_address and resolution.local_address in state.local:
+            return DeliverLocal(resolution.local_address)  # type: ignore
+        if resolution.segments:
+            chosen = self._lb.choose(tuple(capabilities), resolution.segments, envelope)
+            assert chosen, "No segment chosen for capability-aware routing"
+            return ForwardChild(chosen)
+        if state.has_parent:
+            return ForwardUp()
+        return Drop()
+
+    async def _resolve(
+        self, capabilities: list[str], state: RouterState
+    ) -> _Resolution:
+        key = frozenset(capabilities)
+        cached = self._cache.get(key)
+        if (
+            cached is not None
+            and cached.expires_at > time.monotonic()
+            and all(segment in state.child_segments for segment in cached.segments)
+        ):
+            self.stats["hits"] += 1
+            return cached
+        self.stats["misses"] += 1
+        self._index = state.capabilities
+
+        from naylence.fame.node.node import get_node
+
+        resolve_address_by_capability = (
+            state.resolve_address_by_capability
+            or get_node()._service_manager.resolve_address_by_capability  # type: ignore
+        )
+        try:
+            local_address = await resolve_address_by_capability(capabilities)
+        except Exception:
+            local_address = None
+
+        segments: Optional[set[str]] = None
+        for capability in sorted(
+            key, key=lambda c: len(state.capabilities.get(c) or ())
+        ):
+            providers = set((state.capabilities.get(capability) or {}).values())
+            segments = providers if segments is None else segments & providers
+            if not segments:
+                break
+
+        resolution = _Resolution(
+            local_address,
+            sorted(segments or ()),
+            time.monotonic() + self._ttl_sec,
+        )
+        self._cache[key] = resolution
+        for capability in key:
+            self._keys_by_capability.setdefault(capability, set()).add(key)
+        return resolution
+
+    def _on_advertised(self, segment: str, capabilities: list[str]) -> None:
+        # The segment is a new provider of every cached set it now covers
+        # entirely; the capabilities it had before may complete the set.
+        assert self._index is not None
+        for key in self._affected_keys(capabilities):
+            resolution = self._cache[key]
+            if segment in resolution.segments:
+                continue
+            others = sorted(
+                key.difference(capabilities),
+                key=lambda c: len(self._index.get(c) or ()),  # type: ignore
+            )
+            if all(
+                segment in (self._index.get(c) or {}).values()  # type: ignore
+                for c in others
+            ):
+                bisect.insort(resolution.segments, segment)
+                self.stats["updates"] += 1
+
+    def _on_withdrawn(self, segment: str, capabilities: list[str]) -> None:
+        # Only sets the segment provided can lose it.
+        for key in self._affected_keys(capabilities):
+            if segment in self._cache[key].segments:
+                self._invalidate(key)
+
+    def _affected_keys(self, capabilities: list[str]) -> list[frozenset[str]]:
+        keys: set[frozenset[str]] = set()
+        for capability in capabilities:
+            keys.update(self._keys_by_capability.get(capability, ()))
+        return [key for key in keys if key in self._cache]
+
+    def _invalidate(self, key: frozenset[str]) -> None:
+        del self._cache[key]
+        for capability in key:
+            keys = self._keys_by_capability[capability]
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_capability[capability]
+        self.stats["invalidations"] += 1
+
+    async def on_forward_to_route(
+        self,
+        node: NodeLike,
+        next_segment: str,
+        envelope: FameEnvelope,
+        context: FameDeliveryContext | None = None,
+    ) -> FameEnvelope | None:
+        # The sentinel acks a child's advertise or withdraw once its capability
+        # index is updated.
+        frame = envelope.frame
+        if self._index is not None:
+            if frame.type == "CapabilityAdvertiseAck":
+                self._on_advertised(next_segment, frame.capabilities)  # type: ignore
+            elif frame.type == "CapabilityWithdrawAck":
+                self._on_withdrawn(next_segment, frame.capabilities)  # type: ignore
+        return envelope
+
+
+def install_capability_cache(
+    sentinel: NodeLike,
+    ttl_sec: float = 30.0,
+    load_balancing_strategy: Optional[LoadBalancingStrategy] = None,
+) -> CachedCapabilityRoutingPolicy:
+    """
+    Swap the sentinel's capability routing for the cached version, choosing
+    among providers with ``load_balancing_strategy`` if given (it is also
+    registered as a listener if it is one).
+    """
+    current = sentinel._routing_policy  # type: ignore
+    policies = (
+        list(current._policies)
+        if isinstance(current, CompositeRoutingPolicy)
+        else [current]
+    )
+    stock = next(
+        (p for p in policies if isinstance(p, CapabilityAwareRoutingPolicy)), None
+    )
+    if load_balancing_strategy is None and stock is not None:
+        load_balancing_strategy = stock._lb
+    cached = CachedCapabilityRoutingPolicy(
+        load_balancing_strategy=load_balancing_strategy, ttl_sec=ttl_sec
+    )
+    if stock is None:
+        policies.insert(0, cached)
+    else:
+        policies[policies.index(stock)] = cached
+    sentinel._routing_policy = CompositeRoutingPolicy(policies)  # type: ignore
+    sentinel.add_event_listener(cached)
+    if isinstance(load_balancing_strategy, NodeEventListener):
+        sentinel.add_event_listener(load_balancing_strategy)
+    return cached
@@ -1,4 +1,5 @@
 import asyncio
+import time
 from typing import Any
 
 from common import MATH_CAPABILITY
@@ -10,6 +11,8 @@ from naylence.fame.util.logging import enable_logging
 
 enable_logging(log_level="warning")
 
+BURST_SIZE = 100
+
 
 async def main():
     async with FameFabric.create(root_config=configs.CLIENT_CONFIG):
@@ -23,6 +26,15 @@ async def main():
             print(v, end=" ")
         print()
 
+        # A burst the sentinel spreads over the replicas by their load.
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(math_agent.add(x=i, y=i) for i in range(BURST_SIZE))
+        )
+        elapsed = time.perf_counter() - started
+        assert results == [2 * i for i in range(BURST_SIZE)]
+        print(f"{BURST_SIZE} concurrent calls in {elapsed:.2f}s")
+
 
 if __name__ == "__main__":
     asyncio.run(main())
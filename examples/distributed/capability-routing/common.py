@@ -1 +1,9 @@
 MATH_CAPABILITY = "fame.capability.math"
+
+# A provider advertising capacity_capability(2) gets twice the share of load
+# of one with the default weight of 1.
+CAPACITY_CAPABILITY_PREFIX = "fame.capability.capacity:"
+
+
+def capacity_capability(weight: float) -> str:
+    return f"{CAPACITY_CAPABILITY_PREFIX}{weight:g}"
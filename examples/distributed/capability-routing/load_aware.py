@@ -0,0 +1,179 @@
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Literal, Optional, Sequence, get_args
+
+from common import CAPACITY_CAPABILITY_PREFIX
+from naylence.fame.core import DataFrame, FameDeliveryContext, FameEnvelope
+from naylence.fame.node.node_event_listener import NodeEventListener
+from naylence.fame.node.node_like import NodeLike
+from naylence.fame.sentinel.load_balancing.load_balancing_strategy import (
+    LoadBalancingStrategy,
+)
+from pydantic import BaseModel
+
+SelectionMode = Literal["least-outstanding", "ewma", "p2c"]
+
+
+class ReplicaStats(BaseModel):
+    weight: float = 1.0
+    outstanding: int = 0
+    ewma_latency_sec: Optional[float] = None
+    requests: int = 0
+    replies: int = 0
+
+
+def capacity_of(capabilities: list[str]) -> Optional[float]:
+    """The capacity weight advertised among ``capabilities``, if any."""
+    for capability in capabilities:
+        if capability.startswith(CAPACITY_CAPABILITY_PREFIX):
+            try:
+                weight = float(capability[len(CAPACITY_CAPABILITY_PREFIX) :])
+            except ValueError:
+                continue
+            if weight > 0:
+                return weight
+    return None
+
+
+class LoadAwareStrategy(LoadBalancingStrategy, NodeEventListener):
+    """
+    Picks a provider route by its live load, for capability routing.
+
+    As a node event listener on the sentinel, it counts for every route the
+    requests sent to it that have not been answered yet (matched by
+    ``corr_id``) and keeps an EWMA of the time to their first reply. A reply
+    that does not come within ``pending_timeout_sec`` stops counting as
+    outstanding. A provider advertising ``capacity_capability(weight)`` among
+    its capabilities gets that weight; others have 1.
+
+    ``mode`` decides how the load is used:
+
+    * ``least-outstanding``: the route with the fewest outstanding requests
+      per unit of weight;
+    * ``ewma``: the route with the lowest EWMA latency times outstanding
+      requests (plus one), per unit of weight;
+    * ``p2c``: two routes drawn at random in proportion to their weight, of
+      which the one with the lower ``ewma`` cost wins. It spreads load nearly
+      as well as ``ewma`` without every sentinel herding onto the same
+      replica.
+
+    A route with no latency measured yet is assumed as fast as the fastest
+    known one, so new replicas receive traffic right away. Ties are broken at
+    random.
+    """
+
+    def __init__(
+        self,
+        mode: SelectionMode = "p2c",
+        *,
+        ewma_alpha: float = 0.3,
+        pending_timeout_sec: float = 30.0,
+    ):
+        if mode not in get_args(SelectionMode):
+            raise ValueError(f"Unknown selection mode: {mode}")
+        self._mode = mode
+        self._ewma_alpha = ewma_alpha
+        self._pending_timeout_sec = pending_timeout_sec
+        # corr_id -> (segment, sent at); in the order they were sent.
+        self._pending: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self.stats: dict[str, ReplicaStats] = {}
+
+    def choose(
+        self, pool_key: Any, segments: Sequence[str], envelope: FameEnvelope
+    ) -> Optional[str]:
+        if not segments:
+            return None
+        self._expire_pending()
+        if len(segments) == 1:
+            chosen = segments[0]
+        elif self._mode == "p2c":
+            chosen = self._power_of_two(segments)
+        else:
+            chosen = self._cheapest(segments)
+        self._track(chosen, envelope)
+        return chosen
+
+    def _power_of_two(self, segments: Sequence[str]) -> str:
+        weights = [self._replica(s).weight for s in segments]
+        first = random.choices(range(len(segments)), weights)[0]
+        weights[first] = 0
+        second = random.choices(range(len(segments)), weights)[0]
+        return self._cheapest([segments[first], segments[second]])
+
+    def _cheapest(self, segments: Sequence[str]) -> str:
+        fastest = min(
+            (
+                r.ewma_latency_sec
+                for s in segments
+                if (r := self._replica(s)).ewma_latency_sec is not None
+            ),
+            default=1.0,
+        )
+        costs = {s: self._cost(self._replica(s), fastest) for s in segments}
+        lowest = min(costs.values())
+        return random.choice([s for s, c in costs.items() if c == lowest])
+
+    def _cost(self, replica: ReplicaStats, fastest: float) -> float:
+        load = replica.outstanding + (0 if self._mode == "least-outstanding" else 1)
+        if self._mode != "least-outstanding":
+            load *= (
+                fastest
+                if replica.ewma_latency_sec is None
+                else replica.ewma_latency_sec
+            )
+        return load / replica.weight
+
+    def _replica(self, segment: str) -> ReplicaStats:
+        replica = self.stats.get(segment)
+        if replica is None:
+            replica = self.stats[segment] = ReplicaStats()
+        return replica
+
+    def _track(self, segment: str, envelope: FameEnvelope) -> None:
+        replica = self._replica(segment)
+        replica.requests += 1
+        if envelope.corr_id and envelope.corr_id not in self._pending:
+            self._pending[envelope.corr_id] = (segment, time.monotonic())
+            replica.outstanding += 1
+
+    def _expire_pending(self) -> None:
+        cutoff = time.monotonic() - self._pending_timeout_sec
+        while self._pending:
+            corr_id, (segment, sent_at) = next(iter(self._pending.items()))
+            if sent_at > cutoff:
+                break
+            del self._pending[corr_id]
+            self._replica(segment).outstanding -= 1
+
+    async def on_deliver(
+        self,
+        node: NodeLike,
+        envelope: FameEnvelope,
+        context: FameDeliveryContext | None = None,
+    ) -> FameEnvelope | None:
+        frame = envelope.frame
+        if frame.type == "CapabilityAdvertise" and context and context.from_system_id:
+            weight = capacity_of(frame.capabilities)  # type: ignore
+            if weight is not None:
+                self._replica(context.from_system_id).weight = weight
+        elif isinstance(frame, DataFrame) and envelope.corr_id in self._pending:
+            segment, sent_at = self._pending[envelope.corr_id]
+            if context is None or context.from_system_id != segment:
+                return envelope  # not from the provider (e.g. a resent request)
+            # The first reply to a request we routed; later stream items are
+            # not counted again.
+            del self._pending[envelope.corr_id]
+            replica = self._replica(segment)
+            replica.outstanding -= 1
+            replica.replies += 1
+            latency = time.monotonic() - sent_at
+            replica.ewma_latency_sec = (
+                latency
+                if replica.ewma_latency_sec is None
+                else (
+                    self._ewma_alpha * latency
+                    + (1 - self._ewma_alpha) * replica.ewma_latency_sec
+                )
+            )
+        return envelope
@@ -1,6 +1,7 @@
 import asyncio
+import os
 
-from common import MATH_CAPABILITY
+from common import MATH_CAPABILITY, capacity_capability
 
 from naylence.fame.core import AGENT_CAPABILITY
 from naylence.fame.service import operation
@@ -11,6 +12,9 @@ class MathAgent(BaseAgent):
     def __init__(self, name: str | None = None):
         super().__init__(name=name)
         self._capabilities = [AGENT_CAPABILITY, MATH_CAPABILITY]
+        if capacity := os.getenv("MATH_AGENT_CAPACITY"):
+            # Weight for load-aware selection among replicas.
+            self._capabilities.append(capacity_capability(float(capacity)))
 
     @property
     def capabilities(self):
@@ -37,6 +41,8 @@ class MathAgent(BaseAgent):
 if __name__ == "__main__":
     asyncio.run(
         MathAgent().aserve(
-            "math@fame.fabric", root_config=configs.NODE_CONFIG, log_level="warning"
+            os.getenv("MATH_AGENT_ADDRESS", "math@fame.fabric"),
+            root_config=configs.NODE_CONFIG,
+            log_level="warning",
         )
     )
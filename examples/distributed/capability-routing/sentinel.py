@@ -1,7 +1,46 @@
 import asyncio
+import os
+import signal
+
+from capability_cache import install_capability_cache
+from load_aware import LoadAwareStrategy
+from naylence.fame.core import FameFabric
 from naylence.fame.sentinel import Sentinel
+from naylence.fame.util import logging
+
 from naylence.agent import configs
 
+logger = logging.getLogger(__name__)
+
+CACHE_TTL_SEC = float(os.getenv("CAPABILITY_CACHE_TTL_SEC", "30"))
+# p2c, ewma or least-outstanding; "hrw" keeps the stock rendezvous hashing.
+SELECTION = os.getenv("CAPABILITY_SELECTION", "p2c")
+
+
+async def main():
+    # Sentinel.aserve, plus the capability cache once the node exists.
+    logging.enable_logging(log_level="info")
+    stop_evt = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGINT, stop_evt.set)
+    loop.add_signal_handler(signal.SIGTERM, stop_evt.set)
+
+    async with FameFabric.get_or_create(root_config=configs.SENTINEL_CONFIG):
+        from naylence.fame.node.node import get_node
+
+        node = get_node()
+        assert isinstance(node, Sentinel)
+        strategy = None if SELECTION == "hrw" else LoadAwareStrategy(SELECTION)  # type: ignore
+        cache = install_capability_cache(
+            node, ttl_sec=CACHE_TTL_SEC, load_balancing_strategy=strategy
+        )
+        logger.info("Node is live!  Press Ctrl+C to stop.")
+        await stop_evt.wait()
+        logger.info("capability_cache_stats", **cache.stats)
+        if strategy is not None:
+            for segment, replica in strategy.stats.items():
+                logger.info("replica_stats", segment=segment, **replica.model_dump())
+
 
 if __name__ == "__main__":
-    asyncio.run(Sentinel.aserve(root_config=configs.SENTINEL_CONFIG, log_level="info"))
+    asyncio.run(main())
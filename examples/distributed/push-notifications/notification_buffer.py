@@ -0,0 +1,128 @@
+from collections import deque
+from typing import Any, Literal, Optional, get_args
+
+from naylence.fame.storage.key_value_store import KeyValueStore
+from pydantic import BaseModel
+
+OverflowPolicy = Literal["drop-oldest", "spill", "aggregate"]
+
+
+class SpilledNotification(BaseModel):
+    notification: Any
+
+
+class TaskNotifications(BaseModel):
+    notifications: list[Any]
+    dropped: int = 0
+
+
+class _TaskBuffer:
+    def __init__(self):
+        self.items: deque[Any] = deque()
+        self.dropped = 0
+        self.spilled = 0
+        self.summary: Optional[dict] = None
+
+
+class NotificationBuffer:
+    """
+    Holds the notifications of open tasks, within fixed limits.
+
+    A task keeps at most ``max_per_task`` notifications in memory and all
+    tasks together at most ``max_total``; past the total, the task holding the
+    most gives one up. What happens to the oldest notification given up
+    depends on ``policy``:
+
+    * ``drop-oldest`` discards it and counts it as dropped;
+    * ``spill`` moves it to the key-value store passed to ``open_store``, and
+      ``close`` reads it back in order;
+    * ``aggregate`` folds it into a summary at the head of the task's list:
+      ``{"aggregated": <count>, "first": ..., "last": ...}``.
+
+    Notifications for tasks that are not open (unknown, or already closed)
+    are not kept; ``unknown`` counts them.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_per_task: int = 1000,
+        max_total: int = 10_000,
+        policy: OverflowPolicy = "drop-oldest",
+    ):
+        if policy not in get_args(OverflowPolicy):
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self._max_per_task = max_per_task
+        self._max_total = max_total
+        self._policy = policy
+        self._store: Optional[KeyValueStore[SpilledNotification]] = None
+        self._tasks: dict[str, _TaskBuffer] = {}
+        self._total = 0
+        self.unknown = 0
+
+    @property
+    def policy(self) -> OverflowPolicy:
+        return self._policy
+
+    async def open_store(self, store: KeyValueStore[SpilledNotification]) -> None:
+        # Spills of tasks cut short by a restart are never read back.
+        for key in await store.list():
+            await store.delete(key)
+        self._store = store
+
+    def open(self, task_id: str) -> None:
+        if self._policy == "spill" and self._store is None:
+            raise ValueError("The spill policy needs a store; call open_store first")
+        self._tasks.setdefault(task_id, _TaskBuffer())
+
+    async def add(self, task_id: str, notification: Any) -> bool:
+        """Buffer ``notification``; False if ``task_id`` is not open."""
+        buffer = self._tasks.get(task_id)
+        if buffer is None:
+            self.unknown += 1
+            return False
+        buffer.items.append(notification)
+        self._total += 1
+        if len(buffer.items) > self._max_per_task:
+            await self._evict(task_id, buffer)
+        while self._total > self._max_total:
+            fullest = max(self._tasks, key=lambda i: len(self._tasks[i].items))
+            await self._evict(fullest, self._tasks[fullest])
+        return True
+
+    async def close(self, task_id: str) -> TaskNotifications:
+        """Everything kept for ``task_id``, in order; the task is then forgotten."""
+        buffer = self._tasks.pop(task_id, None)
+        if buffer is None:
+            return TaskNotifications(notifications=[])
+        self._total -= len(buffer.items)
+        notifications = [buffer.summary] if buffer.summary else []
+        for seq in range(buffer.spilled):
+            assert self._store is not None
+            key = self._spill_key(task_id, seq)
+            spilled = await self._store.get(key)
+            if spilled is not None:
+                notifications.append(spilled.notification)
+            await self._store.delete(key)
+        notifications.extend(buffer.items)
+        return TaskNotifications(notifications=notifications, dropped=buffer.dropped)
+
+    async def _evict(self, task_id: str, buffer: _TaskBuffer) -> None:
+        oldest = buffer.items.popleft()
+        self._total -= 1
+        if self._policy == "spill":
+            assert self._store is not None
+            key = self._spill_key(task_id, buffer.spilled)
+            buffer.spilled += 1
+            await self._store.set(key, SpilledNotification(notification=oldest))
+        elif self._policy == "aggregate":
+            if buffer.summary is None:
+                buffer.summary = {"aggregated": 0, "first": oldest}
+            buffer.summary["aggregated"] += 1
+            buffer.summary["last"] = oldest
+        else:
+            buffer.dropped += 1
+
+    @staticmethod
+    def _spill_key(task_id: str, seq: int) -> str:
+        return f"{task_id}:{seq:012d}"
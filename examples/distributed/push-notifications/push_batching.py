@@ -0,0 +1,118 @@
+import asyncio
+import time
+from typing import Any, Optional
+
+from naylence.fame.core import FameFabric
+from pydantic import BaseModel
+
+BATCH_KEY = "push_batch"
+
+
+class EndpointStats(BaseModel):
+    notifications: int = 0
+    batches: int = 0
+    failed: int = 0
+
+
+class _Endpoint:
+    def __init__(self, max_pending: int):
+        self.queue: asyncio.Queue[Any] = asyncio.Queue(maxsize=max_pending)
+        self.worker: Optional[asyncio.Task] = None
+
+
+class PushDeliveryEngine:
+    """
+    Delivers push notifications in batches, one queue per endpoint.
+
+    ``push`` queues a notification for its endpoint URL. A worker per endpoint
+    sends what has queued up as one message once ``max_batch_size``
+    notifications are waiting or ``flush_interval_sec`` after the first of
+    them, whichever comes first, and waits for each send before the next, so
+    notifications arrive in order. A lone notification is sent as it is; a
+    batch is sent as ``{"push_batch": [...]}`` and unpacked on the receiving
+    side with ``unpack_notifications``.
+
+    When an endpoint has ``max_pending`` notifications queued, ``push`` to it
+    waits, so a slow endpoint holds back its own producers but not the others.
+    A worker idle for ``idle_timeout_sec`` exits and is started again on the
+    next push.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_batch_size: int = 100,
+        flush_interval_sec: float = 0.05,
+        max_pending: int = 1000,
+        idle_timeout_sec: float = 30.0,
+    ):
+        self._max_batch_size = max_batch_size
+        self._flush_interval_sec = flush_interval_sec
+        self._max_pending = max_pending
+        self._idle_timeout_sec = idle_timeout_sec
+        self._endpoints: dict[str, _Endpoint] = {}
+        self.stats: dict[str, EndpointStats] = {}
+
+    async def push(self, url: str, notification: Any) -> None:
+        endpoint = self._endpoints.get(url)
+        if endpoint is None:
+            endpoint = self._endpoints[url] = _Endpoint(self._max_pending)
+            endpoint.worker = asyncio.create_task(self._deliver(url, endpoint))
+        await endpoint.queue.put(notification)
+
+    async def flush(self, url: Optional[str] = None) -> None:
+        """Wait until everything pushed so far (to ``url``, if given) was sent."""
+        urls = [url] if url is not None else list(self._endpoints)
+        for endpoint in [self._endpoints.get(u) for u in urls]:
+            if endpoint is not None:
+                await endpoint.queue.join()
+
+    async def close(self) -> None:
+        await self.flush()
+        for endpoint in self._endpoints.values():
+            if endpoint.worker is not None:
+                endpoint.worker.cancel()
+        self._endpoints.clear()
+
+    async def _deliver(self, url: str, endpoint: _Endpoint) -> None:
+        stats = self.stats.setdefault(url, EndpointStats())
+        queue = endpoint.queue
+        while True:
+            try:
+                first = await asyncio.wait_for(queue.get(), self._idle_timeout_sec)
+            except asyncio.TimeoutError:
+                if not queue.empty():
+                    continue
+                # Nothing is waiting on an empty queue, so it can go.
+                self._endpoints.pop(url, None)
+                return
+
+            batch = [first]
+            deadline = time.monotonic() + self._flush_interval_sec
+            while len(batch) < self._max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            message = batch[0] if len(batch) == 1 else {BATCH_KEY: batch}
+            try:
+                await FameFabric.current().send_message(url, message)
+                stats.notifications += len(batch)
+                stats.batches += 1
+            except Exception as e:
+                stats.failed += len(batch)
+                print(f"Failed to push {len(batch)} notification(s) to {url}: {e}")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+
+def unpack_notifications(message: Any) -> list[Any]:
+    """The notifications in a message sent by ``PushDeliveryEngine``."""
+    if isinstance(message, dict) and BATCH_KEY in message:
+        return list(message[BATCH_KEY])
+    return [message]
@@ -1,7 +1,10 @@
 import asyncio
+import os
 from typing import Any
 
 from common import RECEIVER_AGENT_ADDR, SENDER_AGENT_ADDR
+from notification_buffer import NotificationBuffer, SpilledNotification
+from push_batching import unpack_notifications
 from naylence.fame.core import generate_id
 
 from naylence.agent import (
@@ -17,27 +20,48 @@ from naylence.agent import (
 class PushReceiver(BackgroundTaskAgent):
     def __init__(self):
         super().__init__()
-        self._notifications_per_task: dict[str, list] = {}
+        self._notifications = NotificationBuffer(
+            max_per_task=int(os.getenv("PUSH_BUFFER_MAX_PER_TASK", "1000")),
+            max_total=int(os.getenv("PUSH_BUFFER_MAX_TOTAL", "10000")),
+            policy=os.getenv("PUSH_BUFFER_POLICY", "drop-oldest"),  # type: ignore
+        )
+
+    async def start(self) -> None:
+        if self._notifications.policy == "spill":
+            assert self.storage_provider is not None
+            await self._notifications.open_store(
+                await self.storage_provider.get_kv_store(
+                    SpilledNotification, namespace="push_receiver_spill"
+                )
+            )
 
     async def run_background_task(self, params: TaskSendParams) -> Any:
         agent = Agent.remote_by_address(SENDER_AGENT_ADDR)
         task_id = generate_id()
-        self._notifications_per_task[task_id] = []
-        # Configure push notifications BEFORE starting the task
-        await agent.register_push_endpoint(
-            TaskPushNotificationConfig(
-                id=task_id,
-                pushNotificationConfig=PushNotificationConfig(url=RECEIVER_AGENT_ADDR),
+        self._notifications.open(task_id)
+        try:
+            # Configure push notifications BEFORE starting the task
+            await agent.register_push_endpoint(
+                TaskPushNotificationConfig(
+                    id=task_id,
+                    pushNotificationConfig=PushNotificationConfig(
+                        url=RECEIVER_AGENT_ADDR
+                    ),
+                )
             )
-        )
-        await agent.run_task(id=task_id)
-        return {"notifications": self._notifications_per_task[task_id]}
+            await agent.run_task(id=task_id)
+        finally:
+            # Frees the task's buffer, whether or not the task succeeded
+            result = await self._notifications.close(task_id)
+        return result.model_dump()
 
     async def on_message(self, message: dict):
-        print(f"{self.__class__.__name__} got notification: {message}")
-        task_id = message["task_id"]
-        notifications = self._notifications_per_task[task_id]
-        notifications.append(message["message"])
+        # A message holds one notification or a batch of them
+        for notification in unpack_notifications(message):
+            print(f"{self.__class__.__name__} got notification: {notification}")
+            task_id = notification["task_id"]
+            if not await self._notifications.add(task_id, notification["message"]):
+                print(f"Ignoring notification for unknown task {task_id}")
 
 
 if __name__ == "__main__":
@@ -1,7 +1,7 @@
 import asyncio
 
 from common import SENDER_AGENT_ADDR
-from naylence.fame.core import FameFabric
+from push_batching import PushDeliveryEngine
 
 from naylence.agent import (
     BackgroundTaskAgent,
@@ -15,20 +15,21 @@ class PushSender(BackgroundTaskAgent):
     def __init__(self):
         super().__init__()
         self._push_notification_configs: dict[str, TaskPushNotificationConfig] = {}
+        # Notifications queued within half a second go out as one message
+        self._push = PushDeliveryEngine(flush_interval_sec=0.5)
 
     async def run_background_task(self, params: TaskSendParams):
         print(f"{self.__class__.__name__} running task {params.id}")
-        fabric = FameFabric.current()
         config = self._push_notification_configs.get(params.id)
         for i in range(1, 10):
             if config:
                 notification = {"task_id": params.id, "message": f"Notification #{i}"}
-                await fabric.send_message(
-                    config.pushNotificationConfig.url,
-                    notification,
-                )
-                print(f"{self.__class__.__name__} sent notification {notification}")
+                await self._push.push(config.pushNotificationConfig.url, notification)
+                print(f"{self.__class__.__name__} queued notification {notification}")
             await asyncio.sleep(0.2)
+        if config:
+            # Deliver what is still queued before the task completes
+            await self._push.flush(config.pushNotificationConfig.url)
         print(f"{self.__class__.__name__} completed task {params.id}")
 
     async def register_push_endpoint(
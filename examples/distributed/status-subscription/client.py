@@ -12,6 +12,8 @@ from naylence.agent import (
     make_task_params,
 )
 
+MAX_RESUMES = 3
+
 
 async def main():
     async with FameFabric.create(root_config=configs.CLIENT_CONFIG):
@@ -21,16 +23,30 @@ async def main():
         # fire off the task
         await agent.start_task(make_task_params(id=task_id))
 
-        # subscribe to the stream
-        updates = await agent.subscribe_to_task_updates(make_task_params(id=task_id))
-
-        async for evt in updates:
-            if isinstance(evt, TaskStatusUpdateEvent):
-                print(f"[STATUS] {evt.status.state}")
-            elif isinstance(evt, TaskArtifactUpdateEvent):
-                part = evt.artifact.parts[0]
-                assert isinstance(part, DataPart)
-                print(f"[DATA ] {part.data['progress']}")
+        # subscribe to the stream; at most 4 progress updates per second, each
+        # the latest one (the final status always comes through). If the
+        # stream breaks, resume after the last event seen.
+        last_seq = 0
+        for attempt in range(MAX_RESUMES + 1):
+            metadata = {"conflation": {"max_per_sec": 4}, "from_seq": last_seq + 1}
+            try:
+                updates = await agent.subscribe_to_task_updates(
+                    make_task_params(id=task_id, metadata=metadata)
+                )
+                async for evt in updates:
+                    last_seq = (evt.metadata or {}).get("seq", last_seq)
+                    if isinstance(evt, TaskStatusUpdateEvent):
+                        print(f"[STATUS] {evt.status.state}")
+                    elif isinstance(evt, TaskArtifactUpdateEvent):
+                        part = evt.artifact.parts[0]
+                        assert isinstance(part, DataPart)
+                        print(f"[DATA ] {part.data['progress']}")
+                break
+            except Exception as e:
+                if attempt == MAX_RESUMES:
+                    raise
+                print(f"[RESUME] stream broke ({e}); resuming at #{last_seq + 1}")
+                await asyncio.sleep(1)
 
 
 if __name__ == "__main__":
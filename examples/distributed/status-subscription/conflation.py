@@ -0,0 +1,164 @@
+import asyncio
+from collections import OrderedDict
+from typing import AsyncIterator, Optional
+
+from pydantic import BaseModel, Field
+
+from naylence.agent import (
+    BackgroundTaskAgent,
+    DataPart,
+    TaskArtifactUpdateEvent,
+    TaskSendParams,
+    TaskStatusUpdateEvent,
+)
+from naylence.agent.base_agent import TERMINAL_TASK_STATES
+
+TaskEvent = TaskStatusUpdateEvent | TaskArtifactUpdateEvent
+
+METADATA_KEY = "conflation"
+_STATUS_KEY = "\0status"
+
+
+class ConflationPolicy(BaseModel):
+    """
+    How one subscription thins out a task's progress updates.
+
+    Artifacts are grouped by ``key_field`` of their first data part (or, if it
+    is not set, by artifact name and index). Of each group only every
+    ``every_nth`` update is delivered, and with ``max_per_sec`` at most that
+    many events go out per second, each carrying the latest update of its
+    group. Terminal status events are always delivered, right after the latest
+    pending update of every group.
+    """
+
+    key_field: Optional[str] = None
+    every_nth: int = Field(default=1, ge=1)
+    max_per_sec: Optional[float] = Field(default=None, gt=0)
+
+    def key_of(self, event: TaskArtifactUpdateEvent) -> str:
+        artifact = event.artifact
+        if self.key_field:
+            for part in artifact.parts:
+                if isinstance(part, DataPart) and self.key_field in part.data:
+                    return str(part.data[self.key_field])
+        return f"{artifact.name}:{artifact.index}"
+
+
+class ConflatingBuffer:
+    """Pending events of one subscription, at most one per group."""
+
+    def __init__(self, policy: ConflationPolicy):
+        self._policy = policy
+        self._pending: OrderedDict[str, TaskEvent] = OrderedDict()
+        self._skipped: dict[str, TaskArtifactUpdateEvent] = {}
+        self._counts: dict[str, int] = {}
+        self._terminal: list[TaskEvent] = []
+        self._closed = False
+        self._changed = asyncio.Event()
+        self.conflated = 0
+
+    @property
+    def finishing(self) -> bool:
+        return bool(self._terminal) or self._closed
+
+    def put(self, event: TaskEvent) -> None:
+        if isinstance(event, TaskStatusUpdateEvent):
+            if event.status.state in TERMINAL_TASK_STATES:
+                # The final value of every group goes out before the end.
+                for key, skipped in self._skipped.items():
+                    self._add(key, skipped)
+                self._skipped.clear()
+                self._terminal.append(event)
+            else:
+                self._add(_STATUS_KEY, event)
+        else:
+            key = self._policy.key_of(event)
+            self._counts[key] = self._counts.get(key, 0) + 1
+            if self._counts[key] % self._policy.every_nth:
+                if key in self._skipped:
+                    self.conflated += 1
+                self._skipped[key] = event
+            else:
+                if self._skipped.pop(key, None) is not None:
+                    self.conflated += 1
+                self._add(key, event)
+        self._changed.set()
+
+    def close(self) -> None:
+        self._closed = True
+        self._changed.set()
+
+    async def get(self) -> Optional[TaskEvent]:
+        """Next event to deliver, or None once the stream has ended."""
+        while True:
+            if self._pending:
+                return self._pending.popitem(last=False)[1]
+            if self._terminal:
+                return self._terminal.pop(0)
+            if self._closed:
+                return None
+            self._changed.clear()
+            await self._changed.wait()
+
+    def _add(self, key: str, event: TaskEvent) -> None:
+        if self._pending.pop(key, None) is not None:
+            self.conflated += 1
+        self._pending[key] = event
+
+
+async def conflate(
+    events: AsyncIterator[TaskEvent], policy: ConflationPolicy
+) -> AsyncIterator[TaskEvent]:
+    """Apply ``policy`` to ``events``, which are read as fast as they arrive."""
+    buffer = ConflatingBuffer(policy)
+
+    async def pump() -> None:
+        try:
+            async for event in events:
+                buffer.put(event)
+        finally:
+            buffer.close()
+
+    pumping = asyncio.create_task(pump())
+    try:
+        while (event := await buffer.get()) is not None:
+            yield event
+            if policy.max_per_sec and not buffer.finishing:
+                await asyncio.sleep(1 / policy.max_per_sec)
+        await pumping
+    finally:
+        pumping.cancel()
+
+
+class ConflatingTaskAgent(BackgroundTaskAgent):
+    """
+    ``BackgroundTaskAgent`` whose update subscriptions can be conflated.
+
+    A subscriber asks for a policy in the metadata of its
+    ``subscribe_to_task_updates`` params:
+
+        make_task_params(id=task_id, metadata={"conflation": {"max_per_sec": 2}})
+
+    Subscriptions without one get ``default_policy``, or every event if that is
+    None. The task's event queue is drained as fast as events are produced, so
+    a slow subscriber never blocks the task, and at most one event per group is
+    held for it.
+    """
+
+    def __init__(
+        self, *args, default_policy: Optional[ConflationPolicy] = None, **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self._default_policy = default_policy
+
+    async def subscribe_to_task_updates(
+        self, params: TaskSendParams
+    ) -> AsyncIterator[TaskEvent]:
+        events = await super().subscribe_to_task_updates(params)
+        requested = (params.metadata or {}).get(METADATA_KEY)
+        policy = (
+            ConflationPolicy.model_validate(requested)
+            if requested is not None
+            else self._default_policy
+        )
+        return conflate(events, policy) if policy else events
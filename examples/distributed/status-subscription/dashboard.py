@@ -0,0 +1,59 @@
+import asyncio
+
+from common import AGENT_ADDR
+from multiplex import parse_task_event
+from naylence.fame.core import FameFabric, generate_id
+
+from naylence.agent import (
+    Agent,
+    DataPart,
+    TaskArtifactUpdateEvent,
+    TaskStatusUpdateEvent,
+    configs,
+    make_task_params,
+)
+from naylence.agent.base_agent import TERMINAL_TASK_STATES
+
+
+async def main():
+    async with FameFabric.create(root_config=configs.CLIENT_CONFIG):
+        agent = Agent.remote_by_address(AGENT_ADDR)
+        task_ids = [generate_id() for _ in range(3)]
+
+        for task_id in task_ids:
+            await agent.start_task(make_task_params(id=task_id))
+
+        # one stream for all three tasks instead of one per task
+        subscription_id = generate_id()
+        updates = await agent.subscribe_to_tasks(
+            _stream=True, subscription_id=subscription_id, task_ids=task_ids
+        )
+
+        running = set(task_ids)
+        late_task_added = False
+        async for payload in updates:
+            evt = parse_task_event(payload)
+            if isinstance(evt, TaskStatusUpdateEvent):
+                print(f"[{evt.id}] [STATUS] {evt.status.state}")
+                if evt.status.state in TERMINAL_TASK_STATES:
+                    running.discard(evt.id)
+            elif isinstance(evt, TaskArtifactUpdateEvent):
+                part = evt.artifact.parts[0]
+                assert isinstance(part, DataPart)
+                print(f"[{evt.id}] [DATA ] {part.data['progress']}")
+
+            if not late_task_added:
+                # the stream is open: track one more task on it
+                late_task_added = True
+                late_task_id = generate_id()
+                running.add(late_task_id)
+                await agent.add_subscription_tasks(
+                    subscription_id=subscription_id, task_ids=[late_task_id]
+                )
+                await agent.start_task(make_task_params(id=late_task_id))
+            if not running:
+                await agent.unsubscribe_tasks(subscription_id=subscription_id)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
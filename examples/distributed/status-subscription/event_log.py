@@ -0,0 +1,171 @@
+import asyncio
+from collections import deque
+from itertools import islice
+from typing import AsyncIterator, Optional
+
+from naylence.agent import (
+    BackgroundTaskAgent,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskIdParams,
+    TaskSendParams,
+    TaskStatusUpdateEvent,
+)
+from naylence.agent.base_agent import TERMINAL_TASK_STATES
+
+TaskEvent = TaskStatusUpdateEvent | TaskArtifactUpdateEvent
+
+FROM_SEQ_KEY = "from_seq"
+
+
+class TaskEventLog:
+    """
+    The last ``max_events`` events of one task, numbered from 1 in
+    ``metadata["seq"]``.
+    """
+
+    def __init__(self, max_events: int):
+        self._events: deque[TaskEvent] = deque(maxlen=max_events)
+        self._changed = asyncio.Condition()
+        self.next_seq = 1
+        self.closed = False
+        self.generation = 0
+
+    @property
+    def first_seq(self) -> int:
+        return self.next_seq - len(self._events)
+
+    async def append(self, event: TaskEvent) -> None:
+        event.metadata = {**(event.metadata or {}), "seq": self.next_seq}
+        self._events.append(event)
+        self.next_seq += 1
+        await self._notify()
+
+    async def close(self) -> None:
+        """No more events: streams end once they have caught up."""
+        self.closed = True
+        await self._notify()
+
+    async def detach(self) -> None:
+        """End the streams open now, without closing the log."""
+        self.generation += 1
+        await self._notify()
+
+    def since(self, seq: int) -> list[TaskEvent]:
+        start = max(seq, self.first_seq) - self.first_seq
+        return list(islice(self._events, start, None))
+
+    async def wait(self, seq: int, generation: int) -> None:
+        async with self._changed:
+            await self._changed.wait_for(
+                lambda: (
+                    self.next_seq > seq or self.closed or self.generation != generation
+                )
+            )
+
+    async def _notify(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
+
+
+class ReplayableTaskAgent(BackgroundTaskAgent):
+    """
+    ``BackgroundTaskAgent`` whose update subscriptions can resume where they
+    broke off.
+
+    Every event of a task is numbered (``metadata["seq"]``) and kept in a
+    bounded per-task log: the last ``max_logged_events`` events, for
+    ``log_retention_sec`` (by default as long as its final status is cached)
+    after the task ends. A subscriber that lost its
+    stream subscribes again from the next event it has not seen:
+
+        make_task_params(id=task_id, metadata={"from_seq": last_seq + 1})
+
+    and receives the events it missed, then the live ones. If some of them are
+    no longer retained, the first event replayed has ``metadata["missed"]``
+    set to how many were lost. Without ``from_seq`` a subscription starts at
+    the oldest retained event, as a first subscription would.
+
+    Unsubscribing ends the streams open for the task, but events keep being
+    logged so a later subscription can still resume.
+    """
+
+    def __init__(
+        self,
+        *args,
+        max_logged_events: int = 1000,
+        log_retention_sec: Optional[float] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self._max_logged_events = max_logged_events
+        self._log_retention_sec = (
+            self._completed_cache_ttl
+            if log_retention_sec is None
+            else log_retention_sec
+        )
+        self._event_logs: dict[str, TaskEventLog] = {}
+
+    async def start_task(self, params: TaskSendParams) -> Task:
+        log = TaskEventLog(self._max_logged_events)
+        self._event_logs[params.id] = log
+        task = await super().start_task(params)
+        asyncio.create_task(self._record(params.id, log))
+        return task
+
+    async def _record(self, task_id: str, log: TaskEventLog) -> None:
+        # The only reader of the task's event queue, so it never fills up.
+        queue = self._task_event_queues[task_id]
+        try:
+            while True:
+                event = await queue.get()
+                if event.id != task_id:
+                    break  # the end-of-stream marker
+                await log.append(event)
+                if (
+                    isinstance(event, TaskStatusUpdateEvent)
+                    and event.status.state in TERMINAL_TASK_STATES
+                ):
+                    break
+        finally:
+            await log.close()
+        await asyncio.sleep(self._log_retention_sec)
+        if self._event_logs.get(task_id) is log:
+            del self._event_logs[task_id]
+
+    async def subscribe_to_task_updates(
+        self, params: TaskSendParams
+    ) -> AsyncIterator[TaskEvent]:
+        log = self._event_logs.get(params.id)
+        if log is None:
+            # Unknown here, or its log has expired.
+            return self._final_status(params.id)
+        from_seq = (params.metadata or {}).get(FROM_SEQ_KEY, 1)
+        return self._replay(log, int(from_seq))
+
+    async def _replay(self, log: TaskEventLog, seq: int) -> AsyncIterator[TaskEvent]:
+        generation = log.generation
+        while generation == log.generation:
+            missed = max(log.first_seq - seq, 0)
+            for event in log.since(seq):
+                if missed:
+                    metadata = {**(event.metadata or {}), "missed": missed}
+                    event = event.model_copy(update={"metadata": metadata})
+                    missed = 0
+                yield event
+                seq = event.metadata["seq"] + 1
+            if log.closed and seq >= log.next_seq:
+                return
+            await log.wait(seq, generation)
+
+    async def _final_status(self, task_id: str) -> AsyncIterator[TaskEvent]:
+        entry = self._completed.get(task_id)
+        if entry:
+            yield TaskStatusUpdateEvent(id=task_id, status=entry[0])
+
+    async def unsubscribe_task(self, params: TaskIdParams) -> None:
+        log = self._event_logs.get(params.id)
+        if log is None:
+            await super().unsubscribe_task(params)
+        else:
+            await log.detach()
@@ -0,0 +1,217 @@
+import asyncio
+from typing import Any, AsyncIterator, Optional
+
+from naylence.fame.service import operation
+from pydantic import BaseModel
+
+from naylence.agent import (
+    Artifact,
+    BackgroundTaskAgent,
+    Message,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+)
+from naylence.agent.base_agent import TERMINAL_TASK_STATES
+
+TaskEvent = TaskStatusUpdateEvent | TaskArtifactUpdateEvent
+
+_end_of_stream = object()
+
+
+class TaskFilter(BaseModel):
+    """
+    Which events a multiplexed subscription receives.
+
+    ``task_ids`` limits it to those tasks (None: every task of the agent);
+    ``states`` limits status events to those states; ``artifacts=False``
+    leaves out artifact events.
+    """
+
+    task_ids: Optional[set[str]] = None
+    states: Optional[set[TaskState]] = None
+    artifacts: bool = True
+
+    def matches(self, event: TaskEvent) -> bool:
+        if self.task_ids is not None and event.id not in self.task_ids:
+            return False
+        if isinstance(event, TaskArtifactUpdateEvent):
+            return self.artifacts
+        return self.states is None or event.status.state in self.states
+
+
+class _Subscription:
+    def __init__(self, subscription_id: str, task_filter: TaskFilter):
+        self.id = subscription_id
+        self.filter = task_filter
+        # Unbounded so producers never wait; _publish enforces the limit.
+        self.queue: asyncio.Queue[Any] = asyncio.Queue()
+        self.ended = False
+        self.overflowed = False
+
+
+class MultiplexingTaskAgent(BackgroundTaskAgent):
+    """
+    ``BackgroundTaskAgent`` that streams the updates of many tasks at once.
+
+    ``subscribe_to_tasks`` opens one stream for a set of task ids or for every
+    task of the agent, narrowed by a ``TaskFilter``. Each event carries its
+    task id in ``id``. Once a stream has started, ``add_subscription_tasks``
+    and ``remove_subscription_tasks`` change its set of tasks and
+    ``unsubscribe_tasks`` ends it. A dashboard tracking thousands of tasks
+    keeps one stream per agent instead of one per task.
+
+    Events are copied to the subscriptions as they are produced, without ever
+    waiting for a subscriber, and the per-task ``subscribe_to_task_updates``
+    streams are not affected. A subscription that falls more than
+    ``max_subscription_queue_size`` events behind is ended with an error; its
+    subscriber can subscribe again and starts from a fresh snapshot.
+    """
+
+    def __init__(self, *args, max_subscription_queue_size: int = 10_000, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._max_subscription_queue_size = max_subscription_queue_size
+        self._multiplex_subscriptions: dict[str, _Subscription] = {}
+
+    @operation(streaming=True)
+    async def subscribe_to_tasks(
+        self,
+        subscription_id: str,
+        task_ids: Optional[list[str]] = None,
+        states: Optional[list[str]] = None,
+        artifacts: bool = True,
+    ) -> AsyncIterator[dict]:
+        """
+        Stream the events of the matching tasks, starting with the current
+        status of each task already known to the agent.
+        """
+        if subscription_id in self._multiplex_subscriptions:
+            raise ValueError(f"Subscription {subscription_id} already exists")
+        task_filter = TaskFilter(
+            task_ids=set(task_ids) if task_ids is not None else None,
+            states={TaskState(s) for s in states} if states is not None else None,
+            artifacts=artifacts,
+        )
+        subscription = _Subscription(subscription_id, task_filter)
+        self._multiplex_subscriptions[subscription_id] = subscription
+        try:
+            self._publish_snapshot(subscription, task_ids)
+            while (event := await subscription.queue.get()) is not _end_of_stream:
+                yield event.model_dump(by_alias=True)
+            if subscription.overflowed:
+                raise RuntimeError(
+                    f"Subscription {subscription_id} fell more than "
+                    f"{self._max_subscription_queue_size} events behind"
+                )
+        finally:
+            if self._multiplex_subscriptions.get(subscription_id) is subscription:
+                del self._multiplex_subscriptions[subscription_id]
+
+    @operation
+    async def add_subscription_tasks(
+        self, subscription_id: str, task_ids: list[str]
+    ) -> None:
+        subscription = self._get_subscription(subscription_id)
+        if subscription.filter.task_ids is None:
+            return  # already receives every task
+        new_ids = [i for i in task_ids if i not in subscription.filter.task_ids]
+        subscription.filter.task_ids.update(new_ids)
+        self._publish_snapshot(subscription, new_ids)
+
+    @operation
+    async def remove_subscription_tasks(
+        self, subscription_id: str, task_ids: list[str]
+    ) -> None:
+        subscription = self._get_subscription(subscription_id)
+        if subscription.filter.task_ids is None:
+            raise ValueError(
+                f"Subscription {subscription_id} receives every task; "
+                "open one with task_ids to remove tasks from it"
+            )
+        subscription.filter.task_ids.difference_update(task_ids)
+
+    @operation
+    async def unsubscribe_tasks(self, subscription_id: str) -> None:
+        subscription = self._multiplex_subscriptions.get(subscription_id)
+        if subscription is not None:
+            self._end(subscription)
+
+    async def update_task_state(
+        self, task_id: str, state: TaskState, message: Optional[Message] = None
+    ) -> bool:
+        updated = await super().update_task_state(task_id, state, message)
+        if updated:
+            status = self._status_of(task_id)
+            assert status
+            self._publish(TaskStatusUpdateEvent(id=task_id, status=status))
+        return updated
+
+    async def update_task_artifact(self, task_id: str, artifact: Artifact):
+        await super().update_task_artifact(task_id, artifact)
+        self._publish(TaskArtifactUpdateEvent(id=task_id, artifact=artifact))
+
+    def _publish(self, event: TaskEvent) -> None:
+        terminal = (
+            isinstance(event, TaskStatusUpdateEvent)
+            and event.status.state in TERMINAL_TASK_STATES
+        )
+        for subscription in list(self._multiplex_subscriptions.values()):
+            if subscription.ended:
+                continue
+            if subscription.filter.matches(event):
+                if subscription.queue.qsize() >= self._max_subscription_queue_size:
+                    # Dropping events would leave the subscriber with a wrong
+                    # picture; end the stream so it resubscribes instead.
+                    subscription.overflowed = True
+                    self._end(subscription)
+                    continue
+                subscription.queue.put_nowait(event)
+            if terminal and subscription.filter.task_ids is not None:
+                # A finished task sends nothing more; stop tracking it.
+                subscription.filter.task_ids.discard(event.id)
+
+    def _publish_snapshot(
+        self, subscription: _Subscription, task_ids: Optional[list[str]]
+    ) -> None:
+        if task_ids is None:
+            task_ids = [*self._task_statuses, *self._completed]
+        for task_id in task_ids:
+            status = self._status_of(task_id)
+            if status is None:
+                continue
+            event = TaskStatusUpdateEvent(id=task_id, status=status)
+            if subscription.filter.matches(event):
+                # One event per task, so a snapshot is not held to the limit.
+                subscription.queue.put_nowait(event)
+            if status.state in TERMINAL_TASK_STATES and subscription.filter.task_ids:
+                subscription.filter.task_ids.discard(task_id)
+
+    def _end(self, subscription: _Subscription) -> None:
+        subscription.ended = True
+        if self._multiplex_subscriptions.get(subscription.id) is subscription:
+            del self._multiplex_subscriptions[subscription.id]
+        if subscription.overflowed:
+            # The stream ends now; what it has not read yet is dropped.
+            while not subscription.queue.empty():
+                subscription.queue.get_nowait()
+        subscription.queue.put_nowait(_end_of_stream)
+
+    def _status_of(self, task_id: str) -> Optional[TaskStatus]:
+        if task_id in self._task_statuses:
+            return self._task_statuses[task_id]
+        completed = self._completed.get(task_id)
+        return completed[0] if completed else None
+
+    def _get_subscription(self, subscription_id: str) -> _Subscription:
+        subscription = self._multiplex_subscriptions.get(subscription_id)
+        if subscription is None:
+            raise ValueError(f"Unknown subscription {subscription_id}")
+        return subscription
+
+
+def parse_task_event(payload: dict) -> TaskEvent:
+    """Turn an event of a ``subscribe_to_tasks`` stream back into a model."""
+    if "artifact" in payload:
+        return TaskArtifactUpdateEvent.model_validate(payload)
+    return TaskStatusUpdateEvent.model_validate(payload)
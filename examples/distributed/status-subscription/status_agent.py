@@ -1,17 +1,19 @@
 import asyncio
 
 from common import AGENT_ADDR
+from conflation import ConflatingTaskAgent
+from event_log import ReplayableTaskAgent
+from multiplex import MultiplexingTaskAgent
 
 from naylence.agent import (
     Artifact,
-    BackgroundTaskAgent,
     DataPart,
     TaskSendParams,
     configs,
 )
 
 
-class StatusAgent(BackgroundTaskAgent):
+class StatusAgent(MultiplexingTaskAgent, ConflatingTaskAgent, ReplayableTaskAgent):
     async def run_background_task(self, params: TaskSendParams):
         # simulate 5 steps of work with progress messages
         for i in range(1, 6):
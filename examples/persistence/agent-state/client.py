@@ -22,6 +22,15 @@ async def main():
         stored_state = await agent.store_value(value)
         print(f"Updated state: {stored_state}")
 
+        # Different keys are locked and persisted independently, so these run
+        # concurrently on the agent instead of queueing behind one state lock.
+        keys = [f"user_{i}" for i in range(5)]
+        await asyncio.gather(
+            *(agent.store_keyed_value(key, f"{value}-{key}") for key in keys)
+        )
+        for key in keys:
+            print(f"Keyed value {key}: {await agent.retrieve_keyed_value(key)}")
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,209 @@
+import json
+from typing import Any, Generic, Optional, TypeVar
+
+from pydantic import BaseModel, Field
+
+from naylence.agent import BaseAgentState
+from tracked_state import TrackedStateAgent
+
+StateT = TypeVar("StateT", bound=BaseAgentState)
+
+_BASE = "base"
+
+
+class FieldChange(BaseModel):
+    """
+    Change to one top-level state field.
+
+    Exactly one form is used: ``value`` replaces the field, ``put``/``remove``
+    patch entries of a dict field, and ``append`` extends a list field from
+    index ``at``. Every form is idempotent, so replaying a delta twice is safe.
+    """
+
+    value: Any = None
+    put: Optional[dict[str, Any]] = None
+    remove: Optional[list[str]] = None
+    append: Optional[list[Any]] = None
+    at: Optional[int] = None
+
+
+class StateDelta(BaseModel):
+    seq: int = Field(..., description="Position in the delta log")
+    changes: dict[str, FieldChange] = Field(default_factory=dict)
+
+
+class DeltaStateAgent(TrackedStateAgent[StateT], Generic[StateT]):
+    """
+    Persists each state change as a small delta instead of the whole state.
+
+    Only the top-level fields that changed are written, and dict and list
+    fields are written entry by entry. Deltas go to a ``<namespace>_deltas``
+    log next to the regular state record, which serves as the snapshot. Once
+    ``compact_every`` deltas have accumulated, or they add up to more bytes than
+    the snapshot and at least ``min_compact_bytes``, the current state is
+    written as the new snapshot and the log is truncated. The byte floor keeps
+    a small state from being rewritten on nearly every other change. Loading
+    reads the snapshot and replays the log on top of it. Deltas at or below
+    the snapshot's position, left behind by a compaction that stopped before
+    truncating the log, are skipped and deleted.
+    """
+
+    def __init__(
+        self,
+        *args,
+        compact_every: int = 100,
+        min_compact_bytes: int = 4096,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self._compact_every = compact_every
+        self._min_compact_bytes = min_compact_bytes
+        self._delta_store = None
+        self._base_seq = 0
+        self._next_seq = 1
+        self._delta_bytes = 0
+        self._snapshot_bytes = 0
+
+    async def compact_state(self) -> None:
+        """Fold the delta log into the snapshot now."""
+        async with self._state_lock:
+            state = await self._load_state()
+            await self._compact(state, state.model_dump(mode="json"))
+
+    async def clear_state(self) -> None:
+        async with self._state_lock:
+            if self._delta_store is not None:
+                await self._truncate_log(self._next_seq - 1)
+                await self._delta_store.delete(self._delta_key(_BASE))
+        await super().clear_state()
+        self._base_seq, self._next_seq = 0, 1
+        self._delta_bytes = 0
+
+    async def _load_state(self) -> StateT:
+        fresh = self._state_cache is None
+        state = await super()._load_state()
+        if not fresh:
+            return state
+
+        base = await self._deltas().get(self._delta_key(_BASE))
+        self._base_seq = base.seq if base else 0
+        self._next_seq = self._base_seq + 1
+        assert self._persisted is not None
+        self._snapshot_bytes = _json_size(self._persisted)
+        self._delta_bytes = 0
+
+        # Truncation deletes upwards, so stale deltas end at the base.
+        stale = self._base_seq
+        while stale > 0 and await self._deltas().get(self._delta_key(stale)):
+            await self._deltas().delete(self._delta_key(stale))
+            stale -= 1
+
+        data = dict(self._persisted)
+        while delta := await self._deltas().get(self._delta_key(self._next_seq)):
+            if delta.seq <= self._base_seq:
+                break
+            apply_changes(data, delta.changes)
+            self._delta_bytes += len(delta.model_dump_json())
+            self._next_seq += 1
+        if self._next_seq == self._base_seq + 1:
+            return state
+
+        state = type(state).model_validate(data)
+        state._set_agent(self)
+        self._state_cache = state
+        self._commit(state, state.model_dump(mode="json"))
+        return state
+
+    async def _write_state(self, state: StateT, data: dict[str, Any]) -> None:
+        if self._persisted is None or self._compaction_due():
+            await self._compact(state, data)
+            return
+        delta = StateDelta(
+            seq=self._next_seq, changes=diff_fields(self._persisted, data)
+        )
+        await self._deltas().set(self._delta_key(delta.seq), delta)
+        self._next_seq += 1
+        self._delta_bytes += len(delta.model_dump_json())
+
+    def _compaction_due(self) -> bool:
+        pending = self._next_seq - 1 - self._base_seq
+        return pending >= self._compact_every or (
+            pending > 0
+            and self._delta_bytes >= max(self._snapshot_bytes, self._min_compact_bytes)
+        )
+
+    async def _compact(self, state: StateT, data: dict[str, Any]) -> None:
+        # Snapshot first, then move the base: a crash in between only means the
+        # (idempotent) deltas are replayed once more on the next load.
+        last = self._next_seq - 1
+        await super()._write_state(state, data)
+        await self._deltas().set(self._delta_key(_BASE), StateDelta(seq=last))
+        await self._truncate_log(last)
+        self._base_seq = last
+        self._delta_bytes = 0
+        self._snapshot_bytes = _json_size(data)
+
+    async def _truncate_log(self, last: int) -> None:
+        for seq in range(self._base_seq + 1, last + 1):
+            await self._deltas().delete(self._delta_key(seq))
+
+    def _deltas(self):
+        assert self._delta_store is not None, "Delta log is not open"
+        return self._delta_store
+
+    async def _ensure_state_store(self, model_type: type[BaseModel]) -> None:
+        await super()._ensure_state_store(model_type)
+        if self._delta_store is None:
+            assert self.storage_provider is not None
+            namespace = self._state_namespace_raw or self._default_state_namespace()
+            self._delta_store = await self.storage_provider.get_kv_store(
+                StateDelta, namespace=f"{namespace}_deltas"
+            )
+
+    def _delta_key(self, seq: int | str) -> str:
+        suffix = f"{seq:012d}" if isinstance(seq, int) else seq
+        return f"{self._state_key}:{suffix}"
+
+
+def _json_size(data: dict[str, Any]) -> int:
+    return len(json.dumps(data, separators=(",", ":")))
+
+
+def diff_fields(old: dict[str, Any], new: dict[str, Any]) -> dict[str, FieldChange]:
+    """Field-level changes turning the JSON-mode dump ``old`` into ``new``."""
+    changes: dict[str, FieldChange] = {}
+    for name, value in new.items():
+        before = old.get(name)
+        if name in old and before == value:
+            continue
+        if isinstance(before, dict) and isinstance(value, dict):
+            changes[name] = FieldChange(
+                put={
+                    k: v for k, v in value.items() if k not in before or before[k] != v
+                },
+                remove=[k for k in before if k not in value],
+            )
+        elif (
+            isinstance(before, list)
+            and isinstance(value, list)
+            and len(value) > len(before)
+            and value[: len(before)] == before
+        ):
+            changes[name] = FieldChange(append=value[len(before) :], at=len(before))
+        else:
+            changes[name] = FieldChange(value=value)
+    return changes
+
+
+def apply_changes(data: dict[str, Any], changes: dict[str, FieldChange]) -> None:
+    for name, change in changes.items():
+        if change.append is not None:
+            data[name] = list(data.get(name) or [])[: change.at] + change.append
+        elif change.put is not None or change.remove is not None:
+            entries = dict(data.get(name) or {})
+            entries.update(change.put or {})
+            for key in change.remove or []:
+                entries.pop(key, None)
+            data[name] = entries
+        else:
+            data[name] = change.value
@@ -2,15 +2,27 @@ import asyncio
 
 from common import AGENT_ADDR
 from naylence.fame.service import operation
+from delta_state import DeltaStateAgent
+from pydantic import BaseModel
+from sharded_state import ShardedState
 
-from naylence.agent import BaseAgent, BaseAgentState, configs
+from naylence.agent import BaseAgentState, configs
 
 
 class CustomAgentState(BaseAgentState):
     value: str | None = None
 
 
-class PersistentAgent(BaseAgent[CustomAgentState]):
+class ValueShard(BaseModel):
+    value: str | None = None
+    writes: int = 0
+
+
+class PersistentAgent(DeltaStateAgent[CustomAgentState]):
+    def __init__(self, name: str | None = None):
+        super().__init__(name)
+        self.values = ShardedState(self, ValueShard, name="values")
+
     @operation
     async def store_value(self, value: str) -> CustomAgentState:
         async with self.state as state:
@@ -19,8 +31,18 @@ class PersistentAgent(BaseAgent[CustomAgentState]):
 
     @operation
     async def retrieve_value(self) -> CustomAgentState | None:
-        async with self.state as state:
-            return state
+        return await self.read_state()
+
+    @operation
+    async def store_keyed_value(self, key: str, value: str) -> ValueShard:
+        async with self.values.shard(key) as shard:
+            shard.value = value
+            shard.writes += 1
+            return shard
+
+    @operation
+    async def retrieve_keyed_value(self, key: str) -> ValueShard | None:
+        return await self.values.read(key)
 
 
 if __name__ == "__main__":
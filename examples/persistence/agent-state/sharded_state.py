@@ -0,0 +1,130 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Generic, Iterable, Optional, TypeVar
+
+from pydantic import BaseModel
+
+from naylence.agent import BaseAgent
+
+S = TypeVar("S", bound=BaseModel)
+
+
+class _KeyLock:
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class ShardedState(Generic[S]):
+    """
+    Keyed agent state: one record and one lock per key.
+
+    ``async with self.state`` holds a single lock for the whole agent, so two
+    operations on unrelated data still run one after the other. Here every key
+    is its own record in ``<state namespace>_<name>`` with its own lock, so
+    different keys are read, updated and persisted independently; only
+    operations on the same key wait for each other. Records are copied out of
+    the store, since a caching provider hands out the instances it keeps.
+
+        self.values = ShardedState(self, ValueShard)
+
+        async with self.values.shard("a") as shard:
+            shard.value = "x"  # saved on exit if changed
+    """
+
+    def __init__(
+        self,
+        agent: BaseAgent,
+        model: type[S],
+        *,
+        name: str = "shards",
+        factory: Optional[Callable[[], S]] = None,
+    ):
+        self._agent = agent
+        self._model = model
+        self._name = name
+        self._factory = factory or model
+        self._store = None
+        self._store_lock = asyncio.Lock()
+        self._locks: dict[str, _KeyLock] = {}
+
+    @asynccontextmanager
+    async def shard(self, key: str) -> AsyncIterator[S]:
+        """Lock ``key``, yield its record (a new one if missing) and save changes."""
+        async with self.shards([key]) as shards:
+            yield shards[key]
+
+    @asynccontextmanager
+    async def shards(self, keys: Iterable[str]) -> AsyncIterator[dict[str, S]]:
+        """Like ``shard`` for several keys at once, e.g. to move data between them."""
+        # Locks are always taken in sorted order so two callers cannot deadlock.
+        keys = sorted(set(keys))
+        async with self._locked(keys):
+            store = await self._get_store()
+            loaded = [
+                v.model_copy(deep=True) if v is not None else None
+                for v in await asyncio.gather(*(store.get(k) for k in keys))
+            ]
+            before = {
+                k: v.model_dump_json() if v is not None else None
+                for k, v in zip(keys, loaded)
+            }
+            shards = {
+                k: v if v is not None else self._factory() for k, v in zip(keys, loaded)
+            }
+            yield shards
+            await asyncio.gather(
+                *(
+                    store.set(k, v)
+                    for k, v in shards.items()
+                    if v.model_dump_json() != before[k]
+                )
+            )
+
+    async def read(self, key: str) -> Optional[S]:
+        """Current record for ``key`` without waiting for its lock."""
+        store = await self._get_store()
+        record = await store.get(key)
+        return record.model_copy(deep=True) if record is not None else None
+
+    async def delete(self, key: str) -> None:
+        async with self._locked([key]):
+            store = await self._get_store()
+            await store.delete(key)
+
+    @asynccontextmanager
+    async def _locked(self, keys: list[str]) -> AsyncIterator[None]:
+        entries = []
+        for key in keys:
+            entry = self._locks.setdefault(key, _KeyLock())
+            entry.users += 1
+            entries.append((key, entry))
+        acquired: list[_KeyLock] = []
+        try:
+            for _, entry in entries:
+                await entry.lock.acquire()
+                acquired.append(entry)
+            yield
+        finally:
+            for entry in acquired:
+                entry.lock.release()
+            for key, entry in entries:
+                entry.users -= 1
+                if entry.users == 0:
+                    # Drop idle locks so the table only holds keys in use.
+                    del self._locks[key]
+
+    async def _get_store(self):
+        if self._store is None:
+            async with self._store_lock:
+                if self._store is None:
+                    provider = self._agent.storage_provider
+                    assert provider is not None, "Storage provider is not available"
+                    agent = self._agent
+                    namespace = (
+                        agent._state_namespace_raw or agent._default_state_namespace()
+                    )
+                    self._store = await provider.get_kv_store(
+                        self._model, namespace=f"{namespace}_{self._name}"
+                    )
+        return self._store
@@ -0,0 +1,72 @@
+from copy import deepcopy
+from typing import Any, Generic, Optional, TypeVar
+
+from naylence.agent import BaseAgent, BaseAgentState
+
+StateT = TypeVar("StateT", bound=BaseAgentState)
+
+
+class TrackedStateAgent(BaseAgent[StateT], Generic[StateT]):
+    """
+    ``BaseAgent`` that only persists state when a state block changed it.
+
+    Leaving ``async with self.state`` normally re-writes (and, with an encrypted
+    profile, re-encrypts) the whole state. Here the state is compared with the
+    last persisted copy first, so a block that only read it writes nothing.
+    Comparing JSON-mode dumps also catches in-place changes such as
+    ``state.items.append(...)``; the last one is kept, so a save dumps the state
+    once.
+
+    ``read_state()`` returns a copy of the last persisted state without taking
+    the state lock, so readers neither wait for nor block writers.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # JSON-mode dump of the last persisted state.
+        self._persisted: Optional[dict[str, Any]] = None
+        self._committed: Optional[StateT] = None
+        self.skipped_saves = 0
+
+    async def read_state(self) -> StateT:
+        """Copy of the last persisted state, read without the state lock."""
+        if self._committed is None:
+            async with self._state_lock:
+                await self._load_state()
+        assert self._committed is not None
+        return self._committed.model_copy(deep=True)
+
+    async def _load_state(self) -> StateT:
+        state = await super()._load_state()
+        if self._persisted is None:
+            self._commit(state, state.model_dump(mode="json"))
+        return state
+
+    async def _save_state(self, state: StateT) -> None:
+        data = state.model_dump(mode="json")
+        if data == self._persisted:
+            self.skipped_saves += 1
+            self._state_cache = state
+            return
+        await self._write_state(state, data)
+        self._commit(state, data)
+
+    async def _write_state(self, state: StateT, data: dict[str, Any]) -> None:
+        """
+        Persist a changed state, whose JSON-mode dump is ``data``; subclasses
+        can write less than all of it.
+        """
+        await super()._save_state(state)
+
+    async def clear_state(self) -> None:
+        await super().clear_state()
+        self._persisted = None
+        self._committed = None
+
+    def _commit(self, state: StateT, data: dict[str, Any]) -> None:
+        self._persisted = data
+        # A detached copy: readers must not see a writer's in-progress changes.
+        # Only the fields are deep-copied; the copy must not carry the agent.
+        committed = state.model_copy(update=deepcopy(dict(state)))
+        committed._set_agent(None)  # type: ignore[arg-type]
+        self._committed = committed
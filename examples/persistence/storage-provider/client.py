@@ -18,13 +18,29 @@ async def main():
         retrieved_value = await agent.retrieve_value(key)
         print(f"\nRetrieved value: {retrieved_value}")
 
+        batch_started = datetime.now(timezone.utc).isoformat()
+        batch = {f"{key}_{i}": f"Bulk value #{i}" for i in range(3)}
+        stored_values = await agent.store_values(batch)
+        print(f"\nStored {len(stored_values)} values in one call")
+
+        await agent.flush()
+
+        retrieved_values = await agent.retrieve_values(list(batch))
+        print(f"\nRetrieved values: {retrieved_values}")
+
+        recent = await agent.retrieve_values_created_between(start=batch_started)
+        print(f"\nValues created since {batch_started}: {list(recent)}")
+
         print("\nAll stored key-values:")
         counter = 0
-        async for v in await agent.retrieve_all_values(_stream=True):
+        async for v in await agent.retrieve_all_values(prefix="key_", _stream=True):
             print(v)
             counter += 1
         print(f"\nTotal stored values: {counter}")
 
+        cache_stats = await agent.cache_stats()
+        print(f"\nRecord cache: {cache_stats}")
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,184 @@
+import time
+from collections import OrderedDict
+from typing import (
+    Any,
+    AsyncIterator,
+    Generic,
+    Iterable,
+    Mapping,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+
+from pydantic import BaseModel, Field, computed_field
+
+from kv_indexes import IndexedKeyValueStore, matching_records
+from kv_store import DEFAULT_PAGE_SIZE, PagedKeyValueStore, ScanPage
+
+V = TypeVar("V", bound=BaseModel)
+
+
+class CacheStats(BaseModel):
+    size: int = Field(0, description="Records currently cached")
+    hits: int = 0
+    misses: int = 0
+    evictions: int = Field(0, description="Records dropped to stay under max size")
+    expirations: int = Field(0, description="Records dropped because their TTL ran out")
+
+    @computed_field
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class CachedKeyValueStore(Generic[V]):
+    """
+    Read-through LRU cache of validated records in front of a paged KV store.
+
+    A hit skips the backend read, the decryption (for encrypted profiles) and the
+    pydantic validation. Writes go straight to the backend and replace or drop
+    the cached copy; scans bypass the cache so they do not evict hot records.
+    """
+
+    def __init__(
+        self,
+        store: PagedKeyValueStore[V],
+        *,
+        max_size: int = 1024,
+        ttl_sec: Optional[float] = None,
+    ):
+        self._store = store
+        self._max_size = max_size
+        self._ttl_sec = ttl_sec
+        self._entries: OrderedDict[str, tuple[V, float]] = OrderedDict()
+        self._stats = CacheStats()
+        # Bumped on every write so a slow read cannot re-cache a stale value.
+        self._write_epoch = 0
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._stats.model_copy(update={"size": len(self._entries)})
+
+    # -- KeyValueStore ---------------------------------------------------
+
+    async def get(self, key: str) -> Optional[V]:
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        epoch = self._write_epoch
+        value = await self._store.get(key)
+        if value is not None and epoch == self._write_epoch:
+            self._remember(key, value)
+        return value
+
+    async def set(self, key: str, value: V) -> None:
+        await self.set_many({key: value})
+
+    async def update(self, key: str, value: V) -> None:
+        self._write_epoch += 1
+        self._entries.pop(key, None)
+        await self._store.update(key, value)
+        self._remember(key, value)
+
+    async def delete(self, key: str) -> None:
+        await self.delete_many([key])
+
+    async def list(self) -> dict[str, V]:
+        return await self._store.list()
+
+    # -- Bulk operations -------------------------------------------------
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, V]:
+        result: dict[str, V] = {}
+        missing: list[str] = []
+        for key in dict.fromkeys(keys):
+            cached = self._lookup(key)
+            if cached is not None:
+                result[key] = cached
+            else:
+                missing.append(key)
+        if missing:
+            epoch = self._write_epoch
+            fetched = await self._store.get_many(missing)
+            if epoch == self._write_epoch:
+                for key, value in fetched.items():
+                    self._remember(key, value)
+            result.update(fetched)
+        return result
+
+    async def set_many(self, items: Mapping[str, V]) -> None:
+        self._write_epoch += 1
+        for key in items:
+            self._entries.pop(key, None)
+        await self._store.set_many(items)
+        for key, value in items.items():
+            self._remember(key, value)
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        self._write_epoch += 1
+        for key in keys:
+            self._entries.pop(key, None)
+        await self._store.delete_many(keys)
+
+    # -- Scanning --------------------------------------------------------
+
+    async def scan_page(
+        self,
+        *,
+        prefix: str = "",
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> ScanPage[V]:
+        return await self._store.scan_page(prefix=prefix, cursor=cursor, limit=limit)
+
+    def scan(
+        self, *, prefix: str = "", page_size: int = DEFAULT_PAGE_SIZE
+    ) -> AsyncIterator[tuple[str, V]]:
+        return self._store.scan(prefix=prefix, page_size=page_size)
+
+    # -- Secondary indexes -----------------------------------------------
+
+    async def query(
+        self,
+        field: str,
+        *,
+        start: Any = None,
+        end: Any = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> Sequence[tuple[str, V]]:
+        if not isinstance(self._store, IndexedKeyValueStore):
+            raise ValueError(f"Field '{field}' is not indexed")
+        entries = await self._store.query_keys(field, start=start, end=end, limit=limit)
+        records = await self.get_many(key for _, key in entries)
+        return matching_records(field, entries, records)
+
+    # -- Cache -----------------------------------------------------------
+
+    def _lookup(self, key: str) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._stats.expirations += 1
+            self._stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats.hits += 1
+        # Hand out a copy so callers cannot mutate the cached record.
+        return value.model_copy()
+
+    def _remember(self, key: str, value: V) -> None:
+        if self._max_size <= 0:
+            return
+        expires_at = time.monotonic() + self._ttl_sec if self._ttl_sec else float("inf")
+        self._entries[key] = (value.model_copy(), expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
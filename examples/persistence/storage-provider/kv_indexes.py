@@ -0,0 +1,289 @@
+import asyncio
+import bisect
+from datetime import date, datetime, timezone
+from typing import Any, Generic, Iterable, Mapping, Sequence, TypeVar
+
+from pydantic import BaseModel, Field
+
+from naylence.fame.storage.key_value_store import KeyValueStore
+
+from kv_store import DEFAULT_PAGE_SIZE, KeyPage, PageRef, PagedKeyValueStore
+
+V = TypeVar("V", bound=BaseModel)
+
+_ROOT_KEY = "root"
+
+
+class IndexPage(BaseModel):
+    """
+    One node of a two-level sorted index.
+
+    Leaves hold sorted ``(value, key)`` entries. The root holds the lowest entry
+    of every leaf in ``entries``, the matching leaf record keys in ``pages``
+    and the number of the next leaf in ``next_page``.
+    """
+
+    entries: list[tuple[Any, str]] = Field(default_factory=list)
+    pages: list[str] = Field(default_factory=list)
+    next_page: int = 0
+
+
+def index_value(value: Any) -> Any:
+    """Map a field value to something that sorts correctly after a JSON round-trip."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.strftime("%Y-%m-%dT%H:%M:%S.%f")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return int(value)
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    raise TypeError(f"Cannot index values of type {type(value).__name__}")
+
+
+class SecondaryIndex:
+    """Sorted index over one model field, stored in its own namespace."""
+
+    def __init__(self, field: str, pages: KeyValueStore[IndexPage], *, page_size: int):
+        self.field = field
+        self._pages = pages
+        self._page_size = page_size
+        self._root = IndexPage()
+
+    async def open(self) -> bool:
+        """Load the root; returns False when the index has never been built."""
+        root = await self._pages.get(_ROOT_KEY)
+        if root is None:
+            return False
+        self._root = root
+        return True
+
+    async def save(self) -> None:
+        await self._pages.set(_ROOT_KEY, self._root)
+
+    async def add(self, entries: Iterable[tuple[Any, str]]) -> None:
+        await self._apply(entries, add=True)
+
+    async def remove(self, entries: Iterable[tuple[Any, str]]) -> None:
+        await self._apply(entries, add=False)
+
+    async def range(
+        self, start: Any = None, end: Any = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> list[tuple[Any, str]]:
+        """Entries with ``start <= value < end`` in ascending order."""
+        result: list[tuple[Any, str]] = []
+        if not self._root.pages:
+            return result
+        lower = (start, "")
+        first = self._leaf_for(lower) if start is not None else 0
+        for page_key in self._root.pages[first:]:
+            leaf = await self._pages.get(page_key) or IndexPage()
+            pos = bisect.bisect_left(leaf.entries, lower) if start is not None else 0
+            for value, key in leaf.entries[pos:]:
+                if end is not None and value >= end:
+                    return result
+                result.append((value, key))
+                if len(result) >= limit:
+                    return result
+        return result
+
+    async def _apply(self, entries: Iterable[tuple[Any, str]], *, add: bool) -> None:
+        by_leaf: dict[int, list[tuple[Any, str]]] = {}
+        for entry in entries:
+            by_leaf.setdefault(self._leaf_for(entry), []).append(entry)
+        if not by_leaf:
+            return
+        # Walk leaves right to left so splits do not shift pending positions.
+        root_changed = False
+        for pos in sorted(by_leaf, reverse=True):
+            root_changed |= await self._apply_leaf(pos, by_leaf[pos], add=add)
+        # Most writes land inside a leaf; the root only changes when a leaf
+        # gets a new lowest entry or splits.
+        if root_changed:
+            await self.save()
+
+    async def _apply_leaf(
+        self, pos: int, entries: list[tuple[Any, str]], *, add: bool
+    ) -> bool:
+        """Apply ``entries`` to the leaf at ``pos``; True if the root changed."""
+        root_changed = False
+        if not self._root.pages:
+            if not add:
+                return False
+            self._root.entries.append(min(entries))
+            self._root.pages.append(self._new_leaf_key())
+            root_changed = True
+        page_key = self._root.pages[pos]
+        leaf = await self._pages.get(page_key) or IndexPage()
+        for entry in entries:
+            i = bisect.bisect_left(leaf.entries, entry)
+            present = i < len(leaf.entries) and leaf.entries[i] == entry
+            if add and not present:
+                leaf.entries.insert(i, entry)
+            elif not add and present:
+                del leaf.entries[i]
+        if leaf.entries and leaf.entries[0] < self._root.entries[pos]:
+            self._root.entries[pos] = leaf.entries[0]
+            root_changed = True
+
+        if len(leaf.entries) <= self._page_size:
+            await self._pages.set(page_key, leaf)
+            return root_changed
+
+        # A large batch can overfill a leaf many times over: split it into as
+        # many evenly filled leaves as it takes for each to be about three
+        # quarters full, leaving room for the next inserts.
+        fill = max(self._page_size * 3 // 4, 1)
+        count = max(-(-len(leaf.entries) // fill), 2)
+        bounds = [len(leaf.entries) * i // count for i in range(count + 1)]
+        chunks = [leaf.entries[a:b] for a, b in zip(bounds, bounds[1:])]
+        await self._pages.set(page_key, IndexPage(entries=chunks[0]))
+        for offset, chunk in enumerate(chunks[1:], start=1):
+            upper_key = self._new_leaf_key()
+            await self._pages.set(upper_key, IndexPage(entries=chunk))
+            self._root.entries.insert(pos + offset, chunk[0])
+            self._root.pages.insert(pos + offset, upper_key)
+        return True
+
+    def _new_leaf_key(self) -> str:
+        if not self._root.next_page and self._root.pages:
+            # A root saved before leaf numbers were tracked.
+            self._root.next_page = max(int(k) for k in self._root.pages) + 1
+        key = _leaf_key(self._root.next_page)
+        self._root.next_page += 1
+        return key
+
+    def _leaf_for(self, entry: tuple[Any, str]) -> int:
+        return max(bisect.bisect_right(self._root.entries, entry) - 1, 0)
+
+
+class IndexedKeyValueStore(PagedKeyValueStore[V], Generic[V]):
+    """
+    Paged KV store that keeps secondary indexes on model fields up to date.
+
+    Writes add the new index entries before the record is stored and remove
+    the old ones afterwards, so an interrupted write can only leave a stale
+    entry behind. ``query`` re-checks every record it returns, which makes
+    stale entries harmless.
+    """
+
+    def __init__(
+        self,
+        store: KeyValueStore[V],
+        pages: KeyValueStore[KeyPage],
+        refs: KeyValueStore[PageRef],
+        indexes: Sequence[SecondaryIndex],
+        *,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ):
+        super().__init__(store, pages, refs, page_size=page_size)
+        self._indexes = {index.field: index for index in indexes}
+        self._index_lock = asyncio.Lock()
+
+    async def open(self) -> "IndexedKeyValueStore[V]":
+        await super().open()
+        unbuilt = [idx for idx in self._indexes.values() if not await idx.open()]
+        if not unbuilt:
+            return self
+
+        # First open with a new index: fill it from the existing records.
+        cursor = None
+        while True:
+            page = await self.scan_page(cursor=cursor)
+            for index in unbuilt:
+                await index.add(_entries(dict(page.items), index.field))
+            if page.cursor is None or len(page.items) < DEFAULT_PAGE_SIZE:
+                break
+            cursor = page.cursor
+        for index in unbuilt:
+            await index.save()
+        return self
+
+    @property
+    def indexed_fields(self) -> list[str]:
+        return list(self._indexes)
+
+    async def update(self, key: str, value: V) -> None:
+        async with self._index_lock:
+            old = await super().get(key)
+            await self._add_entries({key: value})
+            await super().update(key, value)
+            await self._remove_stale_entries({key: old} if old else {}, {key: value})
+
+    async def set_many(self, items: Mapping[str, V]) -> None:
+        if not items:
+            return
+        async with self._index_lock:
+            old = await super().get_many(items)
+            await self._add_entries(items)
+            await super().set_many(items)
+            await self._remove_stale_entries(old, items)
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        async with self._index_lock:
+            old = await super().get_many(keys)
+            await super().delete_many(keys)
+            await self._remove_stale_entries(old, {})
+
+    async def query_keys(
+        self,
+        field: str,
+        *,
+        start: Any = None,
+        end: Any = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> list[tuple[Any, str]]:
+        """Index entries for ``start <= field < end``, ascending, at most ``limit``."""
+        index = self._indexes.get(field)
+        if index is None:
+            raise ValueError(f"Field '{field}' is not indexed")
+        return await index.range(index_value(start), index_value(end), limit)
+
+    async def query(
+        self,
+        field: str,
+        *,
+        start: Any = None,
+        end: Any = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> list[tuple[str, V]]:
+        """Records with ``start <= field < end``, ascending by ``field``."""
+        entries = await self.query_keys(field, start=start, end=end, limit=limit)
+        return matching_records(
+            field, entries, await self.get_many(k for _, k in entries)
+        )
+
+    async def _add_entries(self, items: Mapping[str, V]) -> None:
+        for field, index in self._indexes.items():
+            await index.add(_entries(items, field))
+
+    async def _remove_stale_entries(
+        self, old: Mapping[str, V], new: Mapping[str, V]
+    ) -> None:
+        for field, index in self._indexes.items():
+            await index.remove(set(_entries(old, field)) - set(_entries(new, field)))
+
+
+def matching_records(
+    field: str, entries: Sequence[tuple[Any, str]], records: Mapping[str, V]
+) -> list[tuple[str, V]]:
+    """Pair index entries with their records, dropping entries that went stale."""
+    result: list[tuple[str, V]] = []
+    for value, key in entries:
+        record = records.get(key)
+        if record is not None and index_value(getattr(record, field)) == value:
+            result.append((key, record))
+    return result
+
+
+def _entries(records: Mapping[str, BaseModel], field: str) -> list[tuple[Any, str]]:
+    # Records whose field is unset are simply not indexed.
+    entries = ((index_value(getattr(r, field)), k) for k, r in records.items())
+    return [entry for entry in entries if entry[0] is not None]
+
+
+def _leaf_key(number: int) -> str:
+    return f"{number:010d}"
@@ -0,0 +1,313 @@
+import asyncio
+import bisect
+from dataclasses import dataclass, field
+from typing import (
+    AsyncIterator,
+    Generic,
+    Iterable,
+    Mapping,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+)
+
+from pydantic import BaseModel, Field
+
+from naylence.fame.storage.key_value_store import KeyValueStore
+from naylence.fame.storage.storage_provider import StorageProvider
+
+V = TypeVar("V", bound=BaseModel)
+
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_RECLAIM_BELOW = 0.5
+
+_TAIL_KEY = "tail"
+_LOCATION_PREFIX = "k:"
+
+
+class KeyPage(BaseModel):
+    keys: list[str] = Field(
+        default_factory=list,
+        description="Keys in insertion order; deleted slots are left as empty strings",
+    )
+
+
+class PageRef(BaseModel):
+    page: int = Field(..., description="Directory page number")
+    free: Optional[list[int]] = Field(
+        default=None,
+        description="Pages with reclaimable slots; only set on the tail record",
+    )
+
+
+@dataclass
+class ScanPage(Generic[V]):
+    items: list[tuple[str, V]] = field(default_factory=list)
+    # Cursor to resume from, or None when the scan is exhausted
+    cursor: Optional[str] = None
+
+
+class PagedKeyValueStore(Generic[V]):
+    """
+    Wraps a provider ``KeyValueStore`` with a key directory so the namespace can
+    be scanned page by page instead of through ``list()``.
+
+    The directory lives next to the data in two sibling namespaces: fixed-size
+    ``KeyPage`` records holding the keys, and a ``PageRef`` per key so deletes
+    can find their slot. A deleted key leaves an empty slot rather than
+    shifting the page, which keeps cursors stable across concurrent writes.
+    Once fewer than ``reclaim_below`` of a page's slots are live, the page is
+    put on a free list and its empty slots are handed to new keys before the
+    tail grows, so the directory stays proportional to the live keys.
+    """
+
+    def __init__(
+        self,
+        store: KeyValueStore[V],
+        pages: KeyValueStore[KeyPage],
+        refs: KeyValueStore[PageRef],
+        *,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        reclaim_below: float = DEFAULT_RECLAIM_BELOW,
+    ):
+        self._store = store
+        self._pages = pages
+        self._refs = refs
+        self._page_size = page_size
+        self._reclaim_below = reclaim_below
+        self._tail: Optional[int] = None
+        self._free: list[int] = []
+        self._lock = asyncio.Lock()
+
+    async def open(self) -> "PagedKeyValueStore[V]":
+        tail = await self._refs.get(_TAIL_KEY)
+        if tail is not None:
+            self._tail, self._free = tail.page, tail.free or []
+            return self
+
+        # New directory. Keys are indexed as they are written, so records that
+        # predate it show up in scans once they are set or updated again.
+        self._tail, self._free = 0, []
+        await self._pages.set(_page_key(0), KeyPage())
+        await self._save_head()
+        return self
+
+    # -- KeyValueStore ---------------------------------------------------
+
+    async def set(self, key: str, value: V) -> None:
+        await self.set_many({key: value})
+
+    async def update(self, key: str, value: V) -> None:
+        await self._store.update(key, value)
+        async with self._lock:
+            if await self._refs.get(_LOCATION_PREFIX + key) is None:
+                await self._add_keys([key])
+
+    async def get(self, key: str) -> Optional[V]:
+        return await self._store.get(key)
+
+    async def delete(self, key: str) -> None:
+        await self.delete_many([key])
+
+    async def list(self) -> dict[str, V]:
+        return {k: v async for k, v in self.scan()}
+
+    # -- Bulk operations -------------------------------------------------
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, V]:
+        """Return the records that exist for ``keys``; missing keys are omitted."""
+        keys = list(dict.fromkeys(keys))
+        values = await asyncio.gather(*(self._store.get(k) for k in keys))
+        return {k: v for k, v in zip(keys, values) if v is not None}
+
+    async def set_many(self, items: Mapping[str, V]) -> None:
+        """Store ``items``, touching each directory page at most once."""
+        if not items:
+            return
+        # Directory first: a scan tolerates a key whose value is not there yet.
+        async with self._lock:
+            refs = await asyncio.gather(
+                *(self._refs.get(_LOCATION_PREFIX + k) for k in items)
+            )
+            await self._add_keys([k for k, ref in zip(items, refs) if ref is None])
+        await asyncio.gather(*(self._store.set(k, v) for k, v in items.items()))
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        """Delete ``keys``, rewriting each affected directory page once."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return
+        async with self._lock:
+            refs = await asyncio.gather(
+                *(self._refs.get(_LOCATION_PREFIX + k) for k in keys)
+            )
+            by_page: dict[int, set[str]] = {}
+            for key, ref in zip(keys, refs):
+                if ref is not None:
+                    by_page.setdefault(ref.page, set()).add(key)
+            freed = False
+            for page_no, removed in by_page.items():
+                page = await self._pages.get(_page_key(page_no)) or KeyPage()
+                page.keys = ["" if k in removed else k for k in page.keys]
+                await self._pages.set(_page_key(page_no), page)
+                live = sum(1 for k in page.keys if k)
+                if (
+                    page_no != self._tail
+                    and page_no not in self._free
+                    and live < self._page_size * self._reclaim_below
+                ):
+                    bisect.insort(self._free, page_no)
+                    freed = True
+            await asyncio.gather(
+                *(self._refs.delete(_LOCATION_PREFIX + k) for k in keys)
+            )
+            if freed:
+                await self._save_head()
+        await asyncio.gather(*(self._store.delete(k) for k in keys))
+
+    # -- Scanning --------------------------------------------------------
+
+    async def scan_page(
+        self,
+        *,
+        prefix: str = "",
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> ScanPage[V]:
+        """Return up to ``limit`` items whose key starts with ``prefix``."""
+        assert self._tail is not None, "Store is not open"
+        page_no, offset = _parse_cursor(cursor)
+        result: ScanPage[V] = ScanPage()
+
+        while page_no <= self._tail:
+            page = await self._pages.get(_page_key(page_no))
+            keys = page.keys if page else []
+            while offset < len(keys):
+                key = keys[offset]
+                offset += 1
+                if not key or not key.startswith(prefix):
+                    continue
+                value = await self._store.get(key)
+                if value is None:
+                    continue
+                result.items.append((key, value))
+                if len(result.items) >= limit:
+                    result.cursor = _format_cursor(page_no, offset)
+                    return result
+            if len(keys) < self._page_size and page_no == self._tail:
+                # The tail page may still grow; hand back a cursor at its end.
+                break
+            page_no, offset = page_no + 1, 0
+
+        if result.items:
+            result.cursor = _format_cursor(page_no, offset)
+        return result
+
+    async def scan(
+        self, *, prefix: str = "", page_size: int = DEFAULT_PAGE_SIZE
+    ) -> AsyncIterator[tuple[str, V]]:
+        """Iterate the namespace one page at a time."""
+        cursor: Optional[str] = None
+        while True:
+            page = await self.scan_page(prefix=prefix, cursor=cursor, limit=page_size)
+            for item in page.items:
+                yield item
+            if page.cursor is None or len(page.items) < page_size:
+                return
+            cursor = page.cursor
+
+    # -- Directory -------------------------------------------------------
+
+    async def _add_keys(self, keys: Sequence[str]) -> None:
+        assert self._tail is not None
+        if not keys:
+            return
+        keys = list(keys)
+        free = list(self._free)
+
+        # Refill empty slots on reclaimable pages before growing the tail.
+        while keys and free:
+            page_no = free[0]
+            page = await self._pages.get(_page_key(page_no)) or KeyPage()
+            slots = [i for i, k in enumerate(page.keys) if not k]
+            placed, keys = keys[: len(slots)], keys[len(slots) :]
+            for slot, key in zip(slots, placed):
+                page.keys[slot] = key
+                await self._refs.set(_LOCATION_PREFIX + key, PageRef(page=page_no))
+            if placed:
+                await self._pages.set(_page_key(page_no), page)
+            if len(placed) == len(slots):
+                free.pop(0)
+
+        tail = self._tail
+        if keys:
+            page = await self._pages.get(_page_key(tail)) or KeyPage()
+            for key in keys:
+                if len(page.keys) >= self._page_size:
+                    await self._pages.set(_page_key(tail), page)
+                    tail, page = tail + 1, KeyPage()
+                page.keys.append(key)
+                await self._refs.set(_LOCATION_PREFIX + key, PageRef(page=tail))
+            await self._pages.set(_page_key(tail), page)
+        if tail != self._tail or free != self._free:
+            self._tail, self._free = tail, free
+            await self._save_head()
+
+    async def _save_head(self) -> None:
+        assert self._tail is not None
+        await self._refs.set(_TAIL_KEY, PageRef(page=self._tail, free=self._free))
+
+
+def _page_key(page_no: int) -> str:
+    return f"{page_no:010d}"
+
+
+def _format_cursor(page_no: int, offset: int) -> str:
+    return f"{page_no}:{offset}"
+
+
+def _parse_cursor(cursor: Optional[str]) -> tuple[int, int]:
+    if not cursor:
+        return 0, 0
+    try:
+        page_no, offset = cursor.split(":", 1)
+        return int(page_no), int(offset)
+    except ValueError:
+        raise ValueError(f"Invalid scan cursor: {cursor!r}")
+
+
+async def get_kv_store(
+    storage_provider: StorageProvider,
+    model_cls: Type[V],
+    namespace: str,
+    *,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    indexes: Sequence[str] = (),
+) -> PagedKeyValueStore[V]:
+    """
+    Drop-in for ``storage_provider.get_kv_store`` that adds paginated scans and
+    bulk ``get_many``/``set_many``/``delete_many``.
+
+    Fields listed in ``indexes`` get a sorted secondary index that is kept up to
+    date on every write and can be range-queried with ``query``.
+    """
+    store = await storage_provider.get_kv_store(model_cls, namespace=namespace)
+    pages = await storage_provider.get_kv_store(KeyPage, namespace=f"{namespace}_pages")
+    refs = await storage_provider.get_kv_store(PageRef, namespace=f"{namespace}_refs")
+    if not indexes:
+        return await PagedKeyValueStore(store, pages, refs, page_size=page_size).open()
+
+    from kv_indexes import IndexPage, IndexedKeyValueStore, SecondaryIndex
+
+    secondary = []
+    for name in indexes:
+        if name not in model_cls.model_fields:
+            raise ValueError(f"{model_cls.__name__} has no field '{name}'")
+        index_pages = await storage_provider.get_kv_store(
+            IndexPage, namespace=f"{namespace}_idx_{name}"
+        )
+        secondary.append(SecondaryIndex(name, index_pages, page_size=page_size))
+    return await IndexedKeyValueStore(
+        store, pages, refs, secondary, page_size=page_size
+    ).open()
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Generic, Iterable, Mapping, Optional, TypeVar
+
+from pydantic import BaseModel
+
+from kv_store import DEFAULT_PAGE_SIZE, ScanPage
+
+V = TypeVar("V", bound=BaseModel)
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindKeyValueStore(Generic[V]):
+    """
+    Buffers writes and commits them as one group every ``window_sec``.
+
+    ``set``/``delete`` return as soon as the write is buffered; all writes made
+    within the durability window (or until ``max_batch`` keys are pending) are
+    committed together with one ``set_many`` and one ``delete_many``, and
+    repeated writes to the same key collapse into the last one. Reads see
+    buffered writes immediately. Await ``flush()`` when a write must be on disk
+    before you continue; writes still buffered when the process dies are lost.
+    """
+
+    def __init__(
+        self,
+        store: Any,
+        *,
+        window_sec: float = 0.05,
+        max_batch: int = 1000,
+    ):
+        self._store = store
+        self._window_sec = window_sec
+        self._max_batch = max_batch
+        # Buffered writes; None marks a delete.
+        self._pending: dict[str, Optional[V]] = {}
+        # The group being committed, still visible to readers until it lands.
+        self._committing: dict[str, Optional[V]] = {}
+        self._commit_lock = asyncio.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._commit_task: Optional[asyncio.Task] = None
+        self._error: Optional[BaseException] = None
+        # Keys of groups that failed and have not been committed since.
+        self._failed: set[str] = set()
+        self._closed = False
+
+    # -- KeyValueStore ---------------------------------------------------
+
+    async def get(self, key: str) -> Optional[V]:
+        buffered = self._buffered(key)
+        if buffered is None:
+            return await self._store.get(key)
+        value = buffered[0]
+        return value.model_copy() if value is not None else None
+
+    async def set(self, key: str, value: V) -> None:
+        await self.set_many({key: value})
+
+    async def update(self, key: str, value: V) -> None:
+        # Updates keep their backend semantics, so they are not buffered.
+        await self.flush()
+        await self._store.update(key, value)
+
+    async def delete(self, key: str) -> None:
+        await self.delete_many([key])
+
+    async def list(self) -> dict[str, V]:
+        await self.flush()
+        return await self._store.list()
+
+    # -- Bulk operations -------------------------------------------------
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, V]:
+        result: dict[str, V] = {}
+        missing: list[str] = []
+        for key in dict.fromkeys(keys):
+            buffered = self._buffered(key)
+            if buffered is None:
+                missing.append(key)
+            elif buffered[0] is not None:
+                result[key] = buffered[0].model_copy()
+        if missing:
+            result.update(await self._store.get_many(missing))
+        return result
+
+    async def set_many(self, items: Mapping[str, V]) -> None:
+        self._buffer({k: v.model_copy() for k, v in items.items()})
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        self._buffer(dict.fromkeys(keys))
+
+    # -- Scanning and queries --------------------------------------------
+
+    async def scan_page(
+        self,
+        *,
+        prefix: str = "",
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> ScanPage[V]:
+        await self.flush()
+        return await self._store.scan_page(prefix=prefix, cursor=cursor, limit=limit)
+
+    async def scan(
+        self, *, prefix: str = "", page_size: int = DEFAULT_PAGE_SIZE
+    ) -> AsyncIterator[tuple[str, V]]:
+        await self.flush()
+        async for item in self._store.scan(prefix=prefix, page_size=page_size):
+            yield item
+
+    async def query(self, field: str, **kwargs: Any) -> Any:
+        await self.flush()
+        return await self._store.query(field, **kwargs)
+
+    # -- Group commit ----------------------------------------------------
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def flush(self) -> None:
+        """
+        Barrier: returns once every write buffered before the call is committed.
+
+        Raises the error of a failed background commit, unless every key it
+        failed to write has been committed since.
+        """
+        self._cancel_timer()
+        await self._commit()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    async def close(self) -> None:
+        self._closed = True
+        await self.flush()
+
+    def _buffered(self, key: str) -> Optional[tuple[Optional[V]]]:
+        for group in (self._pending, self._committing):
+            if key in group:
+                return (group[key],)
+        return None
+
+    def _buffer(self, items: Mapping[str, Optional[V]]) -> None:
+        if self._closed:
+            raise RuntimeError("Write-behind store is closed")
+        self._pending.update(items)
+        if len(self._pending) >= self._max_batch:
+            self._cancel_timer()
+            self._start_commit()
+        elif self._timer is None and self._pending:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self._window_sec, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._start_commit()
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _start_commit(self) -> None:
+        if self._commit_task is None or self._commit_task.done():
+            self._commit_task = asyncio.create_task(self._background_commit())
+
+    async def _background_commit(self) -> None:
+        try:
+            await self._commit()
+        except Exception as e:  # surfaced by the next flush()
+            logger.warning("Write-behind commit failed: %s", e)
+            self._error = e
+
+    async def _commit(self) -> None:
+        # Commits run one at a time, so a later group never overtakes an earlier one.
+        async with self._commit_lock:
+            while self._pending:
+                batch, self._pending = self._pending, {}
+                self._committing = batch
+                writes = {k: v for k, v in batch.items() if v is not None}
+                deletes = [k for k, v in batch.items() if v is None]
+                try:
+                    if writes:
+                        await self._store.set_many(writes)
+                    if deletes:
+                        await self._store.delete_many(deletes)
+                except BaseException:
+                    # Put the group back unless the key was written again since.
+                    self._pending = {**batch, **self._pending}
+                    self._failed.update(batch)
+                    raise
+                finally:
+                    self._committing = {}
+                self._failed.difference_update(batch)
+                if not self._failed:
+                    self._error = None
@@ -1,8 +1,12 @@
 import asyncio
+import os
 from datetime import datetime, timezone
 from pydantic import BaseModel, Field
 
 from common import AGENT_ADDR
+from kv_cache import CacheStats, CachedKeyValueStore
+from kv_store import get_kv_store
+from kv_write_behind import WriteBehindKeyValueStore
 from naylence.fame.service import operation
 
 from naylence.agent import BaseAgent, configs
@@ -20,12 +24,37 @@ class StorageAgent(BaseAgent):
     def __init__(self, name: str | None = None):
         super().__init__(name)
         self._store = None
+        self._cache: CachedKeyValueStore | None = None
 
     async def start(self):
         assert self.storage_provider
-        self._store = await self.storage_provider.get_kv_store(
-            RecordModel, namespace="storage_agent_namespace"
+        self._store = await get_kv_store(
+            self.storage_provider,
+            RecordModel,
+            namespace="storage_agent_namespace",
+            indexes=["created"],
         )
+        cache_size = int(os.getenv("STORAGE_CACHE_SIZE", "0"))
+        if cache_size > 0:
+            ttl = float(os.getenv("STORAGE_CACHE_TTL_SEC", "0")) or None
+            self._store = self._cache = CachedKeyValueStore(
+                self._store, max_size=cache_size, ttl_sec=ttl
+            )
+        window_ms = int(os.getenv("STORAGE_WRITE_BEHIND_MS", "0"))
+        if window_ms > 0:
+            self._store = WriteBehindKeyValueStore(
+                self._store, window_sec=window_ms / 1000
+            )
+
+    async def stop(self):
+        try:
+            if isinstance(self._store, WriteBehindKeyValueStore):
+                await self._store.close()
+        finally:
+            # BaseAgent defines no stop() today; chain to it if it ever does.
+            base_stop = getattr(super(), "stop", None)
+            if base_stop is not None:
+                await base_stop()
 
     @operation
     async def store_value(self, key: str, value: str) -> RecordModel:
@@ -42,11 +71,52 @@ class StorageAgent(BaseAgent):
             return None
         return model
 
+    @operation
+    async def store_values(self, values: dict[str, str]) -> dict[str, RecordModel]:
+        assert self._store
+        records = {key: RecordModel(value=value) for key, value in values.items()}
+        await self._store.set_many(records)
+        return records
+
+    @operation
+    async def retrieve_values(self, keys: list[str]) -> dict[str, RecordModel]:
+        assert self._store
+        return await self._store.get_many(keys)
+
+    @operation
+    async def delete_values(self, keys: list[str]) -> None:
+        assert self._store
+        await self._store.delete_many(keys)
+
+    @operation
+    async def retrieve_values_created_between(
+        self, start: str | None = None, end: str | None = None, limit: int = 100
+    ) -> dict[str, RecordModel]:
+        """Records with ``start <= created < end`` (ISO timestamps), oldest first."""
+        assert self._store
+        records = await self._store.query(
+            "created",
+            start=datetime.fromisoformat(start) if start else None,
+            end=datetime.fromisoformat(end) if end else None,
+            limit=limit,
+        )
+        return dict(records)
+
+    @operation
+    async def flush(self) -> None:
+        """Returns once every buffered write is durable."""
+        if isinstance(self._store, WriteBehindKeyValueStore):
+            await self._store.flush()
+
+    @operation
+    async def cache_stats(self) -> CacheStats | None:
+        """Read cache statistics; None when the cache is off."""
+        return self._cache.stats if self._cache is not None else None
+
     @operation(streaming=True)
-    async def retrieve_all_values(self):
+    async def retrieve_all_values(self, prefix: str = "", page_size: int = 100):
         assert self._store
-        models = await self._store.list()
-        for k, v in models.items():
+        async for k, v in self._store.scan(prefix=prefix, page_size=page_size):
             yield k, v
 
 
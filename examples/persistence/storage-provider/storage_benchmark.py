@@ -0,0 +1,283 @@
+"""
+Benchmark the storage profiles with a mixed read/write/scan workload.
+
+    python storage_benchmark.py --keys 2000 --ops 10000 --record-size 512
+
+Each profile gets a fresh data directory under ``--data-dir``. The report has
+ops/sec and latency percentiles per operation, through the ``PagedKeyValueStore``
+wrapper and against the provider's own store, the on-disk size, and, when both
+``sqlite`` and ``encrypted-sqlite`` run, the cost of encryption.
+
+The SQLite profiles run with the provider's value cache off, so every read
+decrypts; ``encrypted-sqlite-cached`` is the configuration a node runs with.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import secrets
+import shutil
+import string
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel
+
+from kv_store import DEFAULT_PAGE_SIZE, PagedKeyValueStore, get_kv_store
+from naylence.fame.factory import create_resource
+from naylence.fame.storage.key_value_store import KeyValueStore
+from naylence.fame.storage.storage_provider_factory import StorageProviderFactory
+
+# Provider configs; the SQLite ones get their directory and key in open_store.
+PROFILES: dict[str, dict[str, Any]] = {
+    "memory": {"type": "InMemoryStorageProvider"},
+    "sqlite": {"type": "SQLiteStorageProvider", "is_cached": False},
+    "encrypted-sqlite": {
+        "type": "SQLiteStorageProvider",
+        "is_encrypted": True,
+        "is_cached": False,
+    },
+    "encrypted-sqlite-cached": {
+        "type": "SQLiteStorageProvider",
+        "is_encrypted": True,
+        "is_cached": True,
+    },
+}
+OPERATIONS = ["read", "write", "scan"]
+# Operations the provider's own store supports, timed without the wrapper.
+RAW_OPERATIONS = ["read", "write"]
+
+
+class BenchRecord(BaseModel):
+    value: str
+    counter: int = 0
+
+
+@dataclass
+class ProfileResult:
+    profile: str
+    load_sec: float = 0.0
+    latencies: dict[str, list[float]] = field(
+        default_factory=lambda: {op: [] for op in OPERATIONS}
+    )
+    raw_latencies: dict[str, list[float]] = field(
+        default_factory=lambda: {op: [] for op in RAW_OPERATIONS}
+    )
+    elapsed_sec: float = 0.0
+    disk_bytes: int = 0
+
+    @property
+    def total_ops(self) -> int:
+        return sum(len(v) for v in self.latencies.values())
+
+    @property
+    def ops_per_sec(self) -> float:
+        return self.total_ops / self.elapsed_sec if self.elapsed_sec else 0.0
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    weights = {op: 0 for op in OPERATIONS}
+    for part in mix.split(","):
+        op, _, weight = part.partition("=")
+        if op not in weights:
+            raise argparse.ArgumentTypeError(f"Unknown operation in mix: {op!r}")
+        weights[op] = int(weight)
+    if not any(weights.values()):
+        raise argparse.ArgumentTypeError("Operation mix is empty")
+    return weights
+
+
+def disk_usage(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+async def open_store(
+    profile: str, data_dir: Path
+) -> tuple[PagedKeyValueStore[BenchRecord], KeyValueStore[BenchRecord]]:
+    """The wrapped store and the provider's own store, over the same records."""
+    config = dict(PROFILES[profile])
+    if config["type"] == "SQLiteStorageProvider":
+        config["db_directory"] = str(data_dir)
+    if config.get("is_encrypted"):
+        config["master_key"] = os.environ.setdefault(
+            "FAME_STORAGE_MASTER_KEY", secrets.token_hex(32)
+        )
+    provider = await create_resource(StorageProviderFactory, config)
+    paged = await get_kv_store(provider, BenchRecord, namespace="bench")
+    raw = await provider.get_kv_store(BenchRecord, namespace="bench")
+    return paged, raw
+
+
+async def run_profile(profile: str, args: argparse.Namespace) -> ProfileResult:
+    result = ProfileResult(profile)
+    data_dir = Path(args.data_dir) / profile
+    shutil.rmtree(data_dir, ignore_errors=True)
+    data_dir.mkdir(parents=True)
+    store, raw = await open_store(profile, data_dir)
+
+    rnd = random.Random(args.seed)
+    keys = [f"key_{i:08d}" for i in range(args.keys)]
+    payload = "".join(rnd.choices(string.ascii_letters, k=args.record_size))
+
+    started = time.perf_counter()
+    for i in range(0, len(keys), args.batch):
+        await store.set_many(
+            {k: BenchRecord(value=payload) for k in keys[i : i + args.batch]}
+        )
+    result.load_sec = time.perf_counter() - started
+
+    ops = rnd.choices(
+        OPERATIONS, weights=[args.mix[op] for op in OPERATIONS], k=args.ops
+    )
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for op in ops:
+        queue.put_nowait(op)
+
+    async def worker(seed: int) -> None:
+        wrnd = random.Random(seed)
+        while not queue.empty():
+            op = queue.get_nowait()
+            key = wrnd.choice(keys)
+            t0 = time.perf_counter()
+            if op == "read":
+                await store.get(key)
+            elif op == "write":
+                await store.set(
+                    key, BenchRecord(value=payload, counter=wrnd.randrange(1 << 30))
+                )
+            else:
+                cursor = f"{wrnd.randrange(max(1, args.keys // DEFAULT_PAGE_SIZE))}:0"
+                await store.scan_page(cursor=cursor, limit=args.scan_length)
+            result.latencies[op].append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(args.seed + n) for n in range(args.concurrency)))
+    result.elapsed_sec = time.perf_counter() - started
+
+    # The same reads and writes straight against the provider's store, to
+    # separate the backend's cost from the wrapper's.
+    raw_ops = [op for op in ops if op in RAW_OPERATIONS]
+    for op in raw_ops:
+        queue.put_nowait(op)
+
+    async def raw_worker(seed: int) -> None:
+        wrnd = random.Random(seed)
+        while not queue.empty():
+            op = queue.get_nowait()
+            key = wrnd.choice(keys)
+            t0 = time.perf_counter()
+            if op == "read":
+                await raw.get(key)
+            else:
+                await raw.set(
+                    key, BenchRecord(value=payload, counter=wrnd.randrange(1 << 30))
+                )
+            result.raw_latencies[op].append(time.perf_counter() - t0)
+
+    await asyncio.gather(*(raw_worker(args.seed + n) for n in range(args.concurrency)))
+    result.disk_bytes = disk_usage(data_dir)
+    return result
+
+
+def op_rate(samples: list[float]) -> float:
+    return len(samples) / sum(samples) if samples else 0.0
+
+
+def print_report(results: list[ProfileResult], args: argparse.Namespace) -> None:
+    print(
+        f"\n{args.keys} keys, {args.record_size} byte values, {args.ops} ops, "
+        f"concurrency {args.concurrency}, mix {args.mix}\n"
+    )
+    header = f"{'profile':<25}{'op':<11}{'count':>8}{'ops/s':>11}" + "".join(
+        f"{col:>9}" for col in ("p50 ms", "p95 ms", "p99 ms", "max ms")
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        load_rate = args.keys / r.load_sec if r.load_sec else 0.0
+        print(f"{r.profile:<25}{'load':<11}{args.keys:>8}{load_rate:>11.0f}")
+        rows = list(r.latencies.items())
+        rows += [(f"raw {op}", samples) for op, samples in r.raw_latencies.items()]
+        for op, samples in rows:
+            if not samples:
+                continue
+            ms = [s * 1000 for s in samples]
+            print(
+                f"{'':<25}{op:<11}{len(samples):>8}{op_rate(samples):>11.0f}"
+                f"{percentile(ms, 50):>9.3f}{percentile(ms, 95):>9.3f}"
+                f"{percentile(ms, 99):>9.3f}{max(ms):>9.3f}"
+            )
+        print(f"{'':<25}{'mixed':<11}{r.total_ops:>8}{r.ops_per_sec:>11.0f}")
+        print(f"{'':<25}on disk: {r.disk_bytes / 1024:.1f} KiB\n")
+
+    by_profile = {r.profile: r for r in results}
+    plain, encrypted = by_profile.get("sqlite"), by_profile.get("encrypted-sqlite")
+    if plain and encrypted and plain.ops_per_sec and plain.disk_bytes:
+        print("Encryption overhead (encrypted-sqlite vs sqlite, both uncached):")
+        print(
+            f"  mixed ops/s:     {encrypted.ops_per_sec / plain.ops_per_sec - 1:+.1%}"
+        )
+        for op in RAW_OPERATIONS:
+            before, after = (
+                op_rate(plain.raw_latencies[op]),
+                op_rate(encrypted.raw_latencies[op]),
+            )
+            if before and after:
+                label = f"raw {op} ops/s:"
+                print(f"  {label:<17}{after / before - 1:+.1%}")
+        print(f"  on disk:         {encrypted.disk_bytes / plain.disk_bytes - 1:+.1%}")
+    cached = by_profile.get("encrypted-sqlite-cached")
+    if cached and encrypted and encrypted.ops_per_sec:
+        print("Provider cache (encrypted-sqlite-cached vs encrypted-sqlite):")
+        print(
+            f"  mixed ops/s:     {cached.ops_per_sec / encrypted.ops_per_sec - 1:+.1%}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--profiles", default=",".join(PROFILES))
+    parser.add_argument(
+        "--keys", type=int, default=1000, help="Records loaded before the run"
+    )
+    parser.add_argument(
+        "--ops", type=int, default=5000, help="Operations in the mixed run"
+    )
+    parser.add_argument(
+        "--record-size", type=int, default=256, help="Value size in bytes"
+    )
+    parser.add_argument("--mix", type=parse_mix, default="read=70,write=25,scan=5")
+    parser.add_argument("--scan-length", type=int, default=50, help="Records per scan")
+    parser.add_argument(
+        "--batch", type=int, default=100, help="Records per set_many while loading"
+    )
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--data-dir", default=os.path.join(tempfile.gettempdir(), "storage-benchmark")
+    )
+    args = parser.parse_args()
+
+    results = []
+    for profile in args.profiles.split(","):
+        if profile not in PROFILES:
+            parser.error(f"Unknown profile: {profile}")
+        print(f"Running {profile}...")
+        results.append(asyncio.run(run_profile(profile, args)))
+    print_report(results, args)
+
+
+if __name__ == "__main__":
+    main()